@@ -1,7 +1,16 @@
+import logging
+import os
+import uuid
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
+
+from engine import MEDAL_OPTIONS
+from figures import FigureCache, athlete_timeline, medal_leaders, medals_per_year, sport_medals
+from instrumentation import Tracer, start_metrics_server
+from leaderboard import DEFAULT_K
+from pagination import PAGE_SIZES, SORT_KEYS, page_of
+from refresher import DatasetRefresher
 
 # -----------------------------------------------------------------------------
 # 1. Page Configuration
@@ -19,6 +28,24 @@ if 'current_page' not in st.session_state:
     st.session_state.current_page = 'dashboard'
 if 'selected_athlete' not in st.session_state:
     st.session_state.selected_athlete = None
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex[:8]
+
+@st.cache_resource
+def get_tracer():
+    # จับเวลาแต่ละช่วงของการ Rerun / OLYMPICS_METRICS_PORT เปิด /metrics (Prometheus) ที่ localhost
+    # OLYMPICS_SPAN_LOG เขียน Log แบบ JSON ทีละบรรทัดต่อการ Rerun
+    tracer = Tracer()
+    if os.environ.get('OLYMPICS_METRICS_PORT'):
+        start_metrics_server(tracer, int(os.environ['OLYMPICS_METRICS_PORT']))
+    if os.environ.get('OLYMPICS_SPAN_LOG'):
+        span_logger = logging.getLogger('instrumentation')
+        span_logger.setLevel(logging.INFO)
+        span_logger.addHandler(logging.FileHandler(os.environ['OLYMPICS_SPAN_LOG']))
+    return tracer
+
+tracer = get_tracer()
+tracer.begin_rerun(st.session_state.session_id, st.session_state.current_page)
 
 def go_to_athlete(athlete_name):
     st.session_state.selected_athlete = athlete_name
@@ -63,48 +90,84 @@ st.markdown("""
 # -----------------------------------------------------------------------------
 # 4. Data Loading & Cleaning
 # -----------------------------------------------------------------------------
-@st.cache_data
-def load_and_clean_data():
+@st.cache_resource
+def get_refresher():
     try:
-        df = pd.read_csv("dataset2.csv")
-        
-        if 'notes' in df.columns: df = df.drop(columns=['notes'])
-        if 'Name' in df.columns:
-            df = df[df['Name'].str.match(r'^[^\W\d_]+(?:[ \.\-][^\W\d_]+)*$', na=False)]
-
-        df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
-        cat_cols = ['Sex', 'Season', 'Team', 'NOC', 'Sport', 'Event', 'City']
-        existing_cat_cols = [col for col in cat_cols if col in df.columns]
-        df[existing_cat_cols] = df[existing_cat_cols].astype('category')
-
-        df['Medal'] = df['Medal'].astype(str).str.strip().str.lower()
-        df['Medal'] = df['Medal'].replace({'no medal': np.nan, '-': np.nan, 'nan': np.nan})
-        df['Medal'] = df['Medal'].fillna('no medal')
-        df['Medal'] = df['Medal'].astype('category')
-
-        if 'region' in df.columns: df['region'] = df['region'].fillna('Unknown')
-
-        df.loc[(df['Age'] > 75) | (df['Age'] < 10), 'Age'] = np.nan 
-        if 'Height' in df.columns: df.loc[(df['Height'] > 250) | (df['Height'] < 120), 'Height'] = np.nan
-        if 'Weight' in df.columns: df.loc[(df['Weight'] > 200) | (df['Weight'] < 25), 'Weight'] = np.nan
-
-        cols_to_impute = [col for col in ['Age', 'Height', 'Weight'] if col in df.columns]
-        for col in cols_to_impute:
-            df[col] = df.groupby(['Sex', 'Sport'])[col].transform(lambda x: x.fillna(x.median()))
-            df[col] = df.groupby('Sex')[col].transform(lambda x: x.fillna(x.median()))
-            df[col] = df[col].fillna(df[col].median())
-
-        df.drop_duplicates(inplace=True)
-        return df
+        # การ Clean, ตัวกรอง และการคำนวณทั้งหมดอยู่ใน engine.py (ใช้ได้โดยไม่ต้องมี Streamlit)
+        # ไฟล์ .arrow ที่ Clean แล้วถูกสร้างครั้งเดียวต่อเครื่อง แล้วทุก Process แมปไฟล์เดียวกัน
+        # Cube / ดัชนีชื่อ / ตารางสรุปนักกีฬา และแคชผลลัพธ์ตามตัวกรองใช้ร่วมกันทุก Session
+        # เมื่อ dataset2.csv เปลี่ยน จะอัปเดตเบื้องหลังแล้วสลับเข้ามาทีเดียว ระหว่างนั้นผู้ใช้ยังเห็นข้อมูลชุดเดิม
+        return DatasetRefresher.start("dataset2.csv", tracer=tracer)
 
     except FileNotFoundError:
         st.error("Error: ไม่พบไฟล์ 'dataset2.csv'")
-        return pd.DataFrame()
-
-df = load_and_clean_data()
-
-if df.empty: 
+        return None
+
+def format_age(seconds):
+    if seconds < 60:
+        return "เมื่อสักครู่"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} นาทีที่แล้ว"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} ชั่วโมงที่แล้ว"
+    return f"{int(seconds // 86400)} วันที่แล้ว"
+
+@st.cache_resource
+def get_figure_cache():
+    # กราฟที่สร้างแล้ว (คีย์ = ชนิดกราฟ + พารามิเตอร์ + Hash ของข้อมูล) ใช้ซ้ำได้ทุก Session
+    return FigureCache()
+
+def leaderboard_views(top):
+    # ตารางเดียวใช้ทั้งกราฟแท่งและตาราง Interactive
+    leaderboard = top['Total'].rename('Total Medals').reset_index()
+    detailed_leaderboard = top.copy()
+    detailed_leaderboard.columns = ['🥇 Gold', '🥈 Silver', '🥉 Bronze', '🏆 Total']
+    return leaderboard, detailed_leaderboard
+
+def paged_table(key, fetch, sort_options=None, default_ascending=True, **dataframe_kwargs):
+    # ตารางแบ่งหน้าฝั่ง Server: เรียงลำดับและตัดหน้าใน engine แล้วส่งไปเบราว์เซอร์เฉพาะแถวที่มองเห็น
+    # fetch(page, page_size, sort_by, ascending) คืน dict แบบ pagination.page_rows / page_of
+    c_sort, c_dir, c_size, c_page = st.columns([2, 2, 1, 1])
+    sort_by, ascending = None, default_ascending
+    if sort_options:
+        with c_sort:
+            sort_by = st.selectbox("เรียงตาม:", sort_options, key=f"{key}_sort")
+        with c_dir:
+            ascending = st.radio("ลำดับ:", [True, False], index=0 if default_ascending else 1, horizontal=True,
+                                 format_func=lambda a: "น้อย → มาก" if a else "มาก → น้อย", key=f"{key}_asc")
+    with c_size:
+        page_size = st.selectbox("แถวต่อหน้า:", PAGE_SIZES, key=f"{key}_size")
+
+    page_key = f"{key}_page"
+    result = fetch(st.session_state.get(page_key, 1), page_size, sort_by, ascending)
+    # หน้าที่ขอเกินจำนวนหน้าจริง (เช่น หลังเปลี่ยนตัวกรอง) จะถูกปรับเป็นหน้าสุดท้าย
+    st.session_state[page_key] = result['page']
+    with c_page:
+        st.number_input(f"หน้า (จาก {result['pages']:,}):", min_value=1, max_value=result['pages'], step=1, key=page_key)
+
+    window = result['rows']
+    if result['total']:
+        st.caption(f"แสดงแถวที่ {result['start'] + 1:,}–{result['start'] + len(window):,} จากทั้งหมด {result['total']:,} แถว")
+    event = st.dataframe(window, **dataframe_kwargs)
+    return window, event
+
+with tracer.span('data_load'):
+    refresher = get_refresher()
+    # อ่านครั้งเดียวต่อการ Rerun: ทั้งหน้าใช้ข้อมูลชุดเดียวกันแม้จะมีการสลับชุดใหม่ระหว่างทาง
+    engine = refresher.current() if refresher is not None else None
+
+if engine is None or engine.df.empty:
     st.stop()
+df = engine.df
+
+# เวอร์ชันและอายุของข้อมูลที่ใช้อยู่
+data_status = refresher.status()
+st.sidebar.caption(f"🗂️ ข้อมูลเวอร์ชัน `{data_status['version'][:8]}` · {data_status['rows']:,} แถว · "
+                   f"อัปเดต{format_age(data_status['age_s'])}"
+                   + (" · ⏳ กำลังอัปเดตข้อมูลเบื้องหลัง" if data_status['refreshing'] else ""))
+if data_status['last_error']:
+    st.sidebar.caption(f"⚠️ อัปเดตข้อมูลล่าสุดไม่สำเร็จ (ยังใช้ชุดเดิม): {data_status['last_error']}")
+figure_cache = get_figure_cache()
 
 color_map = {
     'gold': '#FFD700', 'silver': '#C0C0C0', 
@@ -117,40 +180,46 @@ color_map = {
 
 if st.session_state.current_page == 'dashboard':
     st.sidebar.header("🎯 ตัวกรองข้อมูล (Filters)")
-    min_year, max_year = int(df['Year'].min()), int(df['Year'].max())
+    min_year, max_year = engine.year_bounds()
     year_range = st.sidebar.slider("เลือกช่วงปี:", min_year, max_year, (min_year, max_year))
     
-    all_sports = sorted(df['Sport'].dropna().unique())
+    all_sports = engine.sports()
     selected_sports = st.sidebar.multiselect("เลือกประเภทกีฬา:", all_sports, default=all_sports[:5])
     if not selected_sports: selected_sports = all_sports
     
-    medal_options = ['gold', 'silver', 'bronze', 'no medal']
-    selected_medals = st.sidebar.multiselect("เลือกเหรียญรางวัล:", medal_options, default=medal_options)
+    selected_medals = st.sidebar.multiselect("เลือกเหรียญรางวัล:", MEDAL_OPTIONS, default=MEDAL_OPTIONS)
 
-    df_filtered = df[
-        (df['Year'] >= year_range[0]) & (df['Year'] <= year_range[1]) &
-        (df['Sport'].isin(selected_sports)) & (df['Medal'].isin(selected_medals))
-    ]
+    selection = engine.filter(year_range, selected_sports, selected_medals)
 
     st.title("🏅 Olympic Analytics Dashboard")
     
-    search_list = df['Name'].dropna().unique()
-    selected_search = st.selectbox("🔎 พิมพ์หรือเลือกชื่อนักกีฬาเพื่อดูสถิติเจาะลึก:", options=["-- กรุณาเลือกนักกีฬา --"] + list(search_list))
+    # ส่งไปที่เบราว์เซอร์เฉพาะชื่อที่ตรงกับคำค้น (ไม่เกิน 50 ชื่อ) แทนรายชื่อทั้งหมด
+    col_query, col_pick = st.columns([2, 3])
+    with col_query:
+        search_query = st.text_input("🔎 พิมพ์ชื่อนักกีฬาเพื่อค้นหา:", placeholder="เช่น Michael Phelps")
+    with col_pick:
+        search_list = engine.search(search_query) if search_query else []
+        selected_search = st.selectbox("เลือกนักกีฬาเพื่อดูสถิติเจาะลึก:", options=["-- กรุณาเลือกนักกีฬา --"] + search_list)
     if selected_search != "-- กรุณาเลือกนักกีฬา --":
         go_to_athlete(selected_search)
         st.rerun()
 
     st.markdown("---")
     
-    tab1, tab2 = st.tabs(["📊 ภาพรวมสถิติ (Overview)", "🏆 ตารางอันดับนักกีฬา (Leaderboard)"])
+    tab1, tab2, tab3 = st.tabs(["📊 ภาพรวมสถิติ (Overview)", "🏆 ตารางอันดับนักกีฬา (Leaderboard)",
+                                "🔍 สำรวจข้อมูล (Data Explorer)"])
 
     with tab1:
         st.subheader("ภาพรวมการแข่งขันทั่วโลก")
-        t_gold = len(df_filtered[df_filtered['Medal'] == 'gold'])
-        t_silver = len(df_filtered[df_filtered['Medal'] == 'silver'])
-        t_bronze = len(df_filtered[df_filtered['Medal'] == 'bronze'])
-        t_none = len(df_filtered[df_filtered['Medal'] == 'no medal'])
-        t_athletes = df_filtered['Name'].nunique()
+        # ตัวเลขและกราฟในแท็บนี้ตอบจาก Cube ที่คำนวณไว้แล้ว ไม่ต้องสแกน df_filtered ใหม่
+        with tracer.span('overview'):
+            overview = selection.overview()
+        medal_totals = overview['medal_totals']
+        t_gold = medal_totals.get('gold', 0)
+        t_silver = medal_totals.get('silver', 0)
+        t_bronze = medal_totals.get('bronze', 0)
+        t_none = medal_totals.get('no medal', 0)
+        t_athletes = overview['athletes']
 
         m1, m2, m3, m4, m5 = st.columns(5)
         m1.metric("🥇 เหรียญทอง", f"{t_gold:,}")
@@ -163,66 +232,85 @@ if st.session_state.current_page == 'dashboard':
 
         c1, c2 = st.columns(2)
         with c1:
-            count_by_year = df_filtered.groupby(['Year', 'Medal']).size().reset_index(name='Count')
-            fig_year = px.bar(count_by_year, x='Year', y='Count', color='Medal', color_discrete_map=color_map, title="สถิติเหรียญรางวัลแบ่งตามปี", barmode='group', template="plotly_white")
-            fig_year.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font=dict(color="#000000"))
-            st.plotly_chart(fig_year, width="stretch")
+            count_by_year = overview['count_by_year']
+            with tracer.span('chart_year_build'):
+                fig_year = figure_cache.figure(medals_per_year, count_by_year, color_map=color_map, title="สถิติเหรียญรางวัลแบ่งตามปี")
+            with tracer.span('chart_year_render'):
+                st.plotly_chart(fig_year, width="stretch")
 
         with c2:
-            sport_counts = df_filtered.groupby(['Sport', 'Medal']).size().reset_index(name='Count')
-            sport_total = sport_counts.groupby('Sport')['Count'].sum().reset_index().sort_values('Count', ascending=False)
-            top_sports = sport_total.head(10)['Sport'].tolist()
-            fig_sport = px.bar(sport_counts[sport_counts['Sport'].isin(top_sports)], x='Sport', y='Count', color='Medal', color_discrete_map=color_map, title="10 กีฬายอดนิยม", category_orders={"Sport": top_sports}, template="plotly_white")
-            fig_sport.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font=dict(color="#000000"))
-            st.plotly_chart(fig_sport, width="stretch")
+            sport_counts = overview['sport_counts']
+            top_sports = overview['top_sports']
+            with tracer.span('chart_sport_build'):
+                fig_sport = figure_cache.figure(sport_medals, sport_counts[sport_counts['Sport'].isin(top_sports)], order=top_sports, color_map=color_map, title="10 กีฬายอดนิยม")
+            with tracer.span('chart_sport_render'):
+                st.plotly_chart(fig_sport, width="stretch")
 
     with tab2:
         # --- LEADERBOARD ---
-        st.subheader("🏆 Top 20 Athletes (Leaderboard)")
+        col_k, col_order = st.columns(2)
+        with col_k:
+            top_k = st.select_slider("จำนวนอันดับที่แสดง:", options=[10, 20, 50, 100], value=DEFAULT_K)
+        with col_order:
+            rank_order = st.radio("เรียงอันดับตาม:", ['total', 'olympic'], horizontal=True,
+                                  format_func=lambda o: "จำนวนเหรียญรวม" if o == 'total' else "แบบโอลิมปิก (ทองก่อน)")
+        st.subheader(f"🏆 Top {top_k} Athletes (Leaderboard)")
         
-        # ใช้ df_filtered แทน df เพื่อให้ข้อมูลเชื่อมโยงกับตัวกรองด้านข้าง
-        medals_only = df_filtered[df_filtered['Medal'].isin(['gold', 'silver', 'bronze'])]
+        # ใช้ข้อมูลที่ผ่านตัวกรองด้านข้าง (คำนวณเฉพาะตอนแคชไม่มี)
+        with tracer.span('leaderboard'):
+            top = selection.leaderboard(top_k, rank_order)
         
-        if medals_only.empty:
+        if top.empty:
             st.warning("⚠️ ไม่พบข้อมูลการได้เหรียญรางวัลในประเภทกีฬาหรือช่วงเวลาที่คุณเลือก กรุณาปรับตัวกรองใหม่ครับ")
         else:
-            leaderboard = medals_only.groupby('Name')['Medal'].count().reset_index(name='Total Medals').sort_values('Total Medals', ascending=False).head(20)
+            leaderboard, detailed_leaderboard = leaderboard_views(top)
 
             col_rank1, col_rank2 = st.columns(2)
             with col_rank1:
-                # แก้ไขการตั้งค่าสีพื้นหลังเพื่อให้มองเห็นชัดเจน (template="plotly_white")
-                fig_rank = px.bar(leaderboard, x='Total Medals', y='Name', orientation='h', title="All-Time Medal Leaders", color='Total Medals', color_continuous_scale='Viridis', template="plotly_white")
-                fig_rank.update_layout(yaxis={'categoryorder':'total ascending'}, paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font=dict(color="#000000"))
-                st.plotly_chart(fig_rank, width="stretch")
+                # กราฟสร้างจาก go.Bar โดยตรง (figures.py) พื้นหลังโปร่งใส ใช้ Template plotly_white แบบย่อ
+                with tracer.span('leaderboard_chart'):
+                    fig_rank = figure_cache.figure(medal_leaders, leaderboard, title="All-Time Medal Leaders")
+                    st.plotly_chart(fig_rank, width="stretch")
 
             with col_rank2:
                 st.markdown("#### Leaderboard Data (คลิกที่ตารางเพื่อดูโปรไฟล์ 👇)")
-                top_names = leaderboard['Name'].tolist()
-                detailed_leaderboard = pd.crosstab(medals_only[medals_only['Name'].isin(top_names)]['Name'], medals_only['Medal'])
-                
-                # ป้องกันตารางพังถ้ากีฬาบางประเภทไม่มีคนได้เหรียญบางสี
-                for m in ['gold', 'silver', 'bronze']:
-                    if m not in detailed_leaderboard: detailed_leaderboard[m] = 0
-                    
-                detailed_leaderboard = detailed_leaderboard[['gold', 'silver', 'bronze']] 
-                detailed_leaderboard['Total'] = detailed_leaderboard.sum(axis=1)
-                detailed_leaderboard = detailed_leaderboard.sort_values('Total', ascending=False)
-                detailed_leaderboard.columns = ['🥇 Gold', '🥈 Silver', '🥉 Bronze', '🏆 Total'] 
-
-                # ตารางแบบ Interactive กดเลือกได้
-                event = st.dataframe(
-                    detailed_leaderboard, 
+
+                # ตารางแบบ Interactive กดเลือกได้ (ส่งไปเฉพาะหน้าที่เปิดอยู่ เรียงตามอันดับ)
+                window, event = paged_table(
+                    'leaderboard_table',
+                    lambda page, page_size, sort_by, ascending: page_of(detailed_leaderboard, page, page_size),
                     width="stretch",
-                    on_select="rerun",              
-                    selection_mode="single-row"     
+                    on_select="rerun",
+                    selection_mode="single-row"
                 )
 
                 if len(event.selection.rows) > 0:
                     selected_row_index = event.selection.rows[0]
-                    clicked_athlete = detailed_leaderboard.index[selected_row_index]
+                    clicked_athlete = window.index[selected_row_index]
                     go_to_athlete(clicked_athlete)
                     st.rerun()
 
+    with tab3:
+        # --- DATA EXPLORER ---
+        st.subheader("🔍 ข้อมูลการแข่งขันทั้งหมดตามตัวกรอง (คลิกที่แถวเพื่อดูโปรไฟล์ 👇)")
+        explorer_cols = [c for c in ['Name', 'Sex', 'Age', 'Team', 'Year', 'Season', 'City', 'Sport', 'Event', 'Medal']
+                         if c in df.columns]
+        # เรียงด้วยลำดับที่คำนวณไว้ล่วงหน้า (Year / Name / Sport) แล้วตัดเฉพาะหน้าที่แสดง
+        with tracer.span('explorer'):
+            window, event = paged_table(
+                'explorer_table',
+                lambda page, page_size, sort_by, ascending: selection.page(page, page_size, sort_by, ascending, explorer_cols),
+                sort_options=SORT_KEYS,
+                hide_index=True,
+                width="stretch",
+                on_select="rerun",
+                selection_mode="single-row"
+            )
+
+        if len(event.selection.rows) > 0:
+            go_to_athlete(window['Name'].iloc[event.selection.rows[0]])
+            st.rerun()
+
 elif st.session_state.current_page == 'athlete_profile':
     col_back, col_space = st.columns([1, 5])
     with col_back:
@@ -231,8 +319,13 @@ elif st.session_state.current_page == 'athlete_profile':
             st.rerun()
 
     athlete_name = st.session_state.selected_athlete
-    ath_df = df[df['Name'] == athlete_name]
-    latest_ath = ath_df.sort_values('Year', ascending=False).iloc[0]
+    profile = engine.athlete(athlete_name)
+    if profile is None:
+        st.warning("⚠️ ไม่พบข้อมูลนักกีฬาคนนี้")
+        st.stop()
+    ath_df = profile['events']
+    # ข้อมูลล่าสุดและสรุปผลงานอ่านจากตารางสรุปที่คำนวณไว้แล้ว
+    latest_ath = profile['summary']
 
     st.markdown(f"## 👤 สถิตินักกีฬา: **{athlete_name}**")
     st.markdown("---")
@@ -248,11 +341,11 @@ elif st.session_state.current_page == 'athlete_profile':
     st.markdown("<br>", unsafe_allow_html=True)
     
     st.markdown("### 🏆 สรุปผลงานตลอดชีพ (Career Summary)")
-    ath_gold = len(ath_df[ath_df['Medal'] == 'gold'])
-    ath_silver = len(ath_df[ath_df['Medal'] == 'silver'])
-    ath_bronze = len(ath_df[ath_df['Medal'] == 'bronze'])
-    total_medals = ath_gold + ath_silver + ath_bronze
-    unique_years = ath_df['Year'].nunique()
+    ath_gold = int(latest_ath['gold'])
+    ath_silver = int(latest_ath['silver'])
+    ath_bronze = int(latest_ath['bronze'])
+    total_medals = int(latest_ath['Total'])
+    unique_years = int(latest_ath['Games'])
 
     a1, a2, a3, a4, a5 = st.columns(5)
     a1.metric("🥇 เหรียญทอง", ath_gold)
@@ -265,27 +358,44 @@ elif st.session_state.current_page == 'athlete_profile':
 
     st.markdown("### 📈 ไทม์ไลน์: ปีที่แข่งขัน และกีฬาที่ได้เหรียญ")
     
-    plot_df = ath_df.copy()
-    plot_df['Marker_Size'] = plot_df['Medal'].apply(lambda m: 12 if m in ['gold', 'silver', 'bronze'] else 4)
-    plot_df['Medal_Rank'] = plot_df['Medal'].map({'gold': 1, 'silver': 2, 'bronze': 3, 'no medal': 4})
-    plot_df = plot_df.sort_values(by=['Medal_Rank'], ascending=False)
-    
-    fig_ath = px.scatter(
-        plot_df, x='Year', y='Sport', color='Medal', size='Marker_Size',
-        hover_name='Event', hover_data={'Year': True, 'Sport': False, 'City': True, 'Marker_Size': False, 'Medal_Rank': False},
-        color_discrete_map=color_map, title="จุดกลมใหญ่ = ได้เหรียญรางวัล | เอาเมาส์ชี้เพื่อดู Event การแข่งขัน",
-        template="plotly_white"
-    )
-    fig_ath.update_traces(marker=dict(line=dict(width=1, color='DarkSlateGrey')))
-    fig_ath.update_layout(
-        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font=dict(color="#000000"),
-        xaxis=dict(dtick=4, title="ปีที่แข่งขัน (Year)"), yaxis=dict(title="ประเภทกีฬา (Sport)"), height=400
-    )
-    st.plotly_chart(fig_ath, width="stretch")
+    with tracer.span('profile_timeline_build'):
+        # จุดใหญ่ (12) = ได้เหรียญ, จุดเล็ก (4) = ไม่ได้เหรียญ / จุดที่ได้เหรียญวาดทับด้านบน
+        fig_ath = figure_cache.figure(
+            athlete_timeline, ath_df[['Year', 'Sport', 'Medal', 'Event', 'City']],
+            color_map=color_map, title="จุดกลมใหญ่ = ได้เหรียญรางวัล | เอาเมาส์ชี้เพื่อดู Event การแข่งขัน",
+            x_title="ปีที่แข่งขัน (Year)", y_title="ประเภทกีฬา (Sport)"
+        )
+    with tracer.span('profile_timeline_render'):
+        st.plotly_chart(fig_ath, width="stretch")
 
     st.markdown("#### 📝 ประวัติการลงแข่งทั้งหมด (Detailed Event Log)")
-    hist_table = ath_df[['Year', 'Season', 'City', 'Sport', 'Event', 'Medal']].sort_values('Year', ascending=False)
-    st.dataframe(hist_table, hide_index=True, width="stretch", height=300)
+    # เรียงและแบ่งหน้าใน engine (ค่าเริ่มต้น: ปีล่าสุดก่อน)
+    paged_table(
+        'event_log_table',
+        lambda page, page_size, sort_by, ascending: engine.athlete_events(
+            athlete_name, page, page_size, sort_by, ascending, ['Year', 'Season', 'City', 'Sport', 'Event', 'Medal']),
+        sort_options=['Year', 'Sport'],
+        default_ascending=False,
+        hide_index=True,
+        width="stretch"
+    )
+
+# -----------------------------------------------------------------------------
+# 6. Debug Panel (ซ่อนไว้ เปิดด้วย ?debug=1 หรือ OLYMPICS_DEBUG=1)
+# -----------------------------------------------------------------------------
+if st.query_params.get('debug') == '1' or os.environ.get('OLYMPICS_DEBUG') == '1':
+    with st.sidebar.expander("⏱️ Rerun timings (debug)", expanded=True):
+        recent_reruns = pd.DataFrame(tracer.recent(20))
+        if not recent_reruns.empty:
+            recent_reruns['started'] = pd.to_datetime(recent_reruns['started'], unit='s').dt.strftime('%H:%M:%S')
+            span_cols = [c for c in recent_reruns.columns if c not in ('started', 'session', 'page', 'status')]
+            recent_reruns[span_cols] = (recent_reruns[span_cols] * 1000).round(1)
+            st.caption("หน่วยเป็นมิลลิวินาที (ms) / ล่าสุดอยู่บนสุด")
+            st.dataframe(recent_reruns, hide_index=True, width="stretch")
+        st.json({'dataset': data_status, 'query_cache': engine.cache.stats(),
+                 'figure_cache': get_figure_cache().stats()})
+        st.code(tracer.prometheus_text(), language="text")
 
 st.markdown("---")
-st.markdown("© 2026 Olympic Analytics Dashboard | Built with Streamlit")
\ No newline at end of file
+st.markdown("© 2026 Olympic Analytics Dashboard | Built with Streamlit")
+tracer.end_rerun()
\ No newline at end of file
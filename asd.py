@@ -1,8 +1,9 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
 
+from engine import MEDAL_OPTIONS, OlympicsEngine
+
 # -----------------------------------------------------------------------------
 # 1. Page Configuration
 # -----------------------------------------------------------------------------
@@ -56,47 +57,19 @@ st.markdown("""
 # -----------------------------------------------------------------------------
 # 4. Data Loading & Cleaning
 # -----------------------------------------------------------------------------
-@st.cache_data
-def load_and_clean_data():
+@st.cache_resource
+def load_engine():
     try:
-        df = pd.read_csv("dataset2.csv")
-        
-        if 'notes' in df.columns: df = df.drop(columns=['notes'])
-        if 'Name' in df.columns:
-            df = df[df['Name'].str.match(r'^[^\W\d_]+(?:[ \.\-][^\W\d_]+)*$', na=False)]
-
-        df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
-        cat_cols = ['Sex', 'Season', 'Team', 'NOC', 'Sport', 'Event', 'City']
-        existing_cat_cols = [col for col in cat_cols if col in df.columns]
-        df[existing_cat_cols] = df[existing_cat_cols].astype('category')
-
-        # จัดการ Medal ให้เป็นตัวพิมพ์เล็กทั้งหมด
-        df['Medal'] = df['Medal'].astype(str).str.strip().str.lower()
-        df['Medal'] = df['Medal'].replace({'no medal': np.nan, '-': np.nan})
-        df['Medal'] = df['Medal'].fillna('no medal')
-        df['Medal'] = df['Medal'].astype('category')
-
-        if 'region' in df.columns: df['region'] = df['region'].fillna('Unknown')
-
-        df.loc[(df['Age'] > 75) | (df['Age'] < 10), 'Age'] = np.nan 
-        if 'Height' in df.columns: df.loc[(df['Height'] > 250) | (df['Height'] < 120), 'Height'] = np.nan
-        if 'Weight' in df.columns: df.loc[(df['Weight'] > 200) | (df['Weight'] < 25), 'Weight'] = np.nan
-
-        cols_to_impute = [col for col in ['Age', 'Height', 'Weight'] if col in df.columns]
-        for col in cols_to_impute:
-            df[col] = df.groupby(['Sex', 'Sport'])[col].transform(lambda x: x.fillna(x.median()))
-            df[col] = df.groupby('Sex')[col].transform(lambda x: x.fillna(x.median()))
-            df[col] = df[col].fillna(df[col].median())
-
-        df.drop_duplicates(inplace=True)
-        return df
+        # Cleaning, filtering and aggregation live in engine.py (shared with app.py)
+        return OlympicsEngine.load("dataset2.csv")
 
     except FileNotFoundError:
         st.error("Error: 'dataset2.csv' not found.")
-        return pd.DataFrame()
+        return None
 
-df = load_and_clean_data()
-if df.empty: st.stop()
+engine = load_engine()
+if engine is None or engine.df.empty: st.stop()
+df = engine.df
 
 # Color mapping (อิงตามตัวพิมพ์เล็กที่ Clean มา)
 color_map = {
@@ -113,29 +86,28 @@ if st.session_state.current_page == 'dashboard':
     # PAGE 1: MAIN DASHBOARD
     # -------------------------------------------------------------------------
     st.sidebar.header("🎯 Global Filters")
-    min_year, max_year = int(df['Year'].min()), int(df['Year'].max())
+    min_year, max_year = engine.year_bounds()
     year_range = st.sidebar.slider("Select Year Range:", min_year, max_year, (min_year, max_year))
     
-    all_sports = sorted(df['Sport'].dropna().unique())
+    all_sports = engine.sports()
     selected_sports = st.sidebar.multiselect("Select Sport(s):", all_sports, default=all_sports[:5])
     if not selected_sports: selected_sports = all_sports
     
-    medal_options = ['gold', 'silver', 'bronze', 'no medal']
-    selected_medals = st.sidebar.multiselect("Select Medal Type(s):", medal_options, default=medal_options)
+    selected_medals = st.sidebar.multiselect("Select Medal Type(s):", MEDAL_OPTIONS, default=MEDAL_OPTIONS)
 
-    df_filtered = df[
-        (df['Year'] >= year_range[0]) & (df['Year'] <= year_range[1]) &
-        (df['Sport'].isin(selected_sports)) & (df['Medal'].isin(selected_medals))
-    ]
+    selection = engine.filter(year_range, selected_sports, selected_medals)
 
     st.title("🏅 Olympic Analytics Dashboard")
     
     # --- ค้นหานักกีฬาเพื่อไปยังหน้าโปรไฟล์ ---
     st.markdown("### 🔎 ค้นหาโปรไฟล์นักกีฬาเจาะลึก")
-    col_search, col_btn = st.columns([4, 1])
+    # ส่งไปที่เบราว์เซอร์เฉพาะชื่อที่ตรงกับคำค้น (ไม่เกิน 50 ชื่อ) แทนรายชื่อทั้งหมด
+    col_query, col_search, col_btn = st.columns([2, 2, 1])
+    with col_query:
+        search_query = st.text_input("พิมพ์ชื่อนักกีฬา:", placeholder="เช่น Michael Phelps")
     with col_search:
-        search_list = df['Name'].dropna().unique()
-        selected_search = st.selectbox("พิมพ์หรือเลือกชื่อนักกีฬา:", options=["-- กรุณาเลือกนักกีฬา --"] + list(search_list))
+        search_list = engine.search(search_query) if search_query else []
+        selected_search = st.selectbox("เลือกนักกีฬา:", options=["-- กรุณาเลือกนักกีฬา --"] + search_list)
     with col_btn:
         st.markdown("<br>", unsafe_allow_html=True) # เว้นบรรทัดให้ปุ่มตรงกับกล่องข้อความ
         if st.button("ดูโปรไฟล์แบบเต็ม 🚀", use_container_width=True):
@@ -149,11 +121,12 @@ if st.session_state.current_page == 'dashboard':
     
     # --- ภาพรวม ---
     st.subheader("📊 Global Medal Overview")
-    t_gold = len(df_filtered[df_filtered['Medal'] == 'gold'])
-    t_silver = len(df_filtered[df_filtered['Medal'] == 'silver'])
-    t_bronze = len(df_filtered[df_filtered['Medal'] == 'bronze'])
-    t_none = len(df_filtered[df_filtered['Medal'] == 'no medal'])
-    t_athletes = df_filtered['Name'].nunique()
+    overview = selection.overview()
+    t_gold = overview['medal_totals'].get('gold', 0)
+    t_silver = overview['medal_totals'].get('silver', 0)
+    t_bronze = overview['medal_totals'].get('bronze', 0)
+    t_none = overview['medal_totals'].get('no medal', 0)
+    t_athletes = overview['athletes']
 
     m1, m2, m3, m4, m5 = st.columns(5)
     m1.metric("🥇 Total Gold", f"{t_gold:,}")
@@ -164,15 +137,14 @@ if st.session_state.current_page == 'dashboard':
 
     c1, c2 = st.columns(2)
     with c1:
-        count_by_year = df_filtered.groupby(['Year', 'Medal']).size().reset_index(name='Count')
+        count_by_year = overview['count_by_year']
         fig_year = px.bar(count_by_year, x='Year', y='Count', color='Medal', color_discrete_map=color_map, title="Medals per Year", barmode='group')
         fig_year.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
         st.plotly_chart(fig_year, width="stretch")
 
     with c2:
-        sport_counts = df_filtered.groupby(['Sport', 'Medal']).size().reset_index(name='Count')
-        sport_total = sport_counts.groupby('Sport')['Count'].sum().reset_index().sort_values('Count', ascending=False)
-        top_sports = sport_total.head(10)['Sport'].tolist()
+        sport_counts = overview['sport_counts']
+        top_sports = overview['top_sports']
         fig_sport = px.bar(sport_counts[sport_counts['Sport'].isin(top_sports)], x='Sport', y='Count', color='Medal', color_discrete_map=color_map, title="Top 10 Sports by Activity", category_orders={"Sport": top_sports})
         fig_sport.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
         st.plotly_chart(fig_sport, width="stretch")
@@ -181,8 +153,8 @@ if st.session_state.current_page == 'dashboard':
 
     # --- LEADERBOARD ---
     st.subheader("🏆 Top 20 Athletes (Leaderboard)")
-    medals_only = df[df['Medal'].isin(['gold', 'silver', 'bronze'])]
-    leaderboard = medals_only.groupby('Name')['Medal'].count().reset_index(name='Total Medals').sort_values('Total Medals', ascending=False).head(20)
+    top = engine.leaderboard(20)
+    leaderboard = top['Total'].rename('Total Medals').reset_index()
 
     col_rank1, col_rank2 = st.columns(2)
     with col_rank1:
@@ -191,16 +163,7 @@ if st.session_state.current_page == 'dashboard':
         st.plotly_chart(fig_rank, width="stretch")
 
     with col_rank2:
-        top_names = leaderboard['Name'].tolist()
-        # ใช้ pd.crosstab เพื่อให้ตารางออกมาสวยงาม ไม่มี Multi-index ซ้อนกัน
-        detailed_leaderboard = pd.crosstab(medals_only[medals_only['Name'].isin(top_names)]['Name'], medals_only['Medal'])
-        # ตรวจสอบว่ามีคอลัมน์ครบไหม
-        for m in ['gold', 'silver', 'bronze']:
-            if m not in detailed_leaderboard: detailed_leaderboard[m] = 0
-            
-        detailed_leaderboard = detailed_leaderboard[['gold', 'silver', 'bronze']] # จัดเรียงคอลัมน์
-        detailed_leaderboard['Total'] = detailed_leaderboard.sum(axis=1)
-        detailed_leaderboard = detailed_leaderboard.sort_values('Total', ascending=False)
+        detailed_leaderboard = top.copy()
         detailed_leaderboard.columns = ['🥇 Gold', '🥈 Silver', '🥉 Bronze', '🏆 Total'] # เปลี่ยนชื่อให้น่าอ่าน
         st.dataframe(detailed_leaderboard, width="stretch")
 
@@ -213,8 +176,12 @@ elif st.session_state.current_page == 'athlete_profile':
         st.rerun()
 
     athlete_name = st.session_state.selected_athlete
-    ath_df = df[df['Name'] == athlete_name]
-    latest_ath = ath_df.sort_values('Year', ascending=False).iloc[0]
+    profile = engine.athlete(athlete_name)
+    if profile is None:
+        st.warning("Athlete not found.")
+        st.stop()
+    ath_df = profile['events']
+    latest_ath = profile['summary']
 
     st.markdown(f"## 👤 Athlete Profile: **{athlete_name}**")
     st.markdown("---")
@@ -232,11 +199,11 @@ elif st.session_state.current_page == 'athlete_profile':
     
     # --- สรุปเหรียญทั้งหมดของนักกีฬาคนนี้ ---
     st.markdown("### 🏆 Career Summary")
-    ath_gold = len(ath_df[ath_df['Medal'] == 'gold'])
-    ath_silver = len(ath_df[ath_df['Medal'] == 'silver'])
-    ath_bronze = len(ath_df[ath_df['Medal'] == 'bronze'])
-    total_medals = ath_gold + ath_silver + ath_bronze
-    unique_years = ath_df['Year'].nunique()
+    ath_gold = int(latest_ath['gold'])
+    ath_silver = int(latest_ath['silver'])
+    ath_bronze = int(latest_ath['bronze'])
+    total_medals = int(latest_ath['Total'])
+    unique_years = int(latest_ath['Games'])
 
     a1, a2, a3, a4, a5 = st.columns(5)
     a1.metric("🥇 Total Gold", ath_gold)
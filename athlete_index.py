@@ -0,0 +1,88 @@
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------
+# Athlete name index
+# -----------------------------------------------------------------------------
+# Name -> row positions (CSR layout over the cleaned frame) for O(1) profile
+# lookups, plus a case-folded sorted list for prefix search and a trigram
+# posting list for substring search, so the search box only ever receives the
+# top matches instead of every distinct name.
+DEFAULT_LIMIT = 50
+_MAX_CODEPOINT = '\U0010ffff'
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class AthleteIndex:
+    def __init__(self, names, positions, offsets):
+        self.names = names            # distinct names, sorted
+        self.positions = positions    # row positions grouped by name code
+        self.offsets = offsets        # positions[offsets[c]:offsets[c + 1]] belong to names[c]
+        self._code_of = {name: code for code, name in enumerate(names)}
+
+        folded = [name.casefold() for name in names]
+        self._folded = folded
+        self._prefix_order = np.argsort(np.array(folded, dtype=object), kind='stable')
+        self._prefix_keys = [folded[c] for c in self._prefix_order]
+
+        postings = {}
+        for code, name in enumerate(folded):
+            for gram in _trigrams(name):
+                postings.setdefault(gram, []).append(code)
+        self._postings = {gram: np.array(codes, dtype=np.int32) for gram, codes in postings.items()}
+
+    @classmethod
+    def from_frame(cls, df):
+        codes, names = pd.factorize(df['Name'], sort=True)
+        valid = codes >= 0
+        row_positions = np.flatnonzero(valid)
+        order = np.argsort(codes[valid], kind='stable')
+        counts = np.bincount(codes[valid], minlength=len(names))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return cls(list(names), row_positions[order], offsets)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._code_of
+
+    def rows(self, name):
+        # row positions (for df.iloc) of every entry of this athlete, in file order
+        code = self._code_of.get(name)
+        if code is None:
+            return self.positions[:0]
+        return self.positions[self.offsets[code]:self.offsets[code + 1]]
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        # prefix matches first (alphabetical), then substring matches via trigrams
+        query = query.strip().casefold()
+        if not query:
+            return []
+
+        lo = bisect_left(self._prefix_keys, query)
+        hi = bisect_left(self._prefix_keys, query + _MAX_CODEPOINT, lo)
+        codes = self._prefix_order[lo:min(hi, lo + limit)].tolist()
+
+        if len(codes) < limit and len(query) >= 3:
+            postings = sorted((self._postings.get(g) for g in _trigrams(query)),
+                              key=lambda p: -1 if p is None else len(p))
+            if postings[0] is not None:
+                candidates = postings[0]
+                for posting in postings[1:]:
+                    candidates = np.intersect1d(candidates, posting, assume_unique=True)
+                    if len(candidates) == 0:
+                        break
+                seen = set(codes)
+                for code in candidates.tolist():
+                    if code not in seen and query in self._folded[code]:
+                        codes.append(code)
+                        if len(codes) >= limit:
+                            break
+
+        return [self.names[code] for code in codes]
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from leaderboard import DEFAULT_K, MEDALS, top_k
+
+# -----------------------------------------------------------------------------
+# Materialized athlete career summaries
+# -----------------------------------------------------------------------------
+# One row per athlete (index = Name, sorted): medal counts, Games attended,
+# first/last year and the physical/team attributes of their latest entry.
+# Built once per dataset, so a profile view is a single .loc lookup.
+LATEST_COLS = ['Sex', 'Age', 'Height', 'Weight', 'Team', 'region']
+
+
+def build_athlete_summary(df):
+    codes, names = pd.factorize(df['Name'], sort=True)
+    valid = codes >= 0
+    codes = codes[valid]
+    n = len(names)
+    years = df['Year'].to_numpy(dtype=np.int64)[valid]
+
+    medal_idx = pd.Categorical(df['Medal'], categories=MEDALS).codes[valid]
+    medalled = medal_idx >= 0
+    counts = np.bincount(codes[medalled].astype(np.int64) * len(MEDALS) + medal_idx[medalled],
+                         minlength=n * len(MEDALS)).reshape(n, len(MEDALS))
+
+    per_year = pd.DataFrame({'code': codes, 'Year': years}).groupby('code')['Year']
+    spans = per_year.agg(['min', 'max', 'nunique'])
+
+    # latest entry = first row in file order among the athlete's max Year rows,
+    # the same row sort_values('Year', ascending=False).iloc[0] picks
+    positions = np.flatnonzero(valid)
+    order = np.lexsort((positions, -years, codes))
+    first_of_name = np.flatnonzero(np.r_[True, codes[order][1:] != codes[order][:-1]])
+    latest_rows = positions[order[first_of_name]]
+
+    summary = pd.DataFrame(counts, columns=MEDALS, index=pd.Index(names, name='Name'))
+    summary['Total'] = counts.sum(axis=1)
+    summary['Games'] = spans['nunique'].to_numpy()
+    summary['First Year'] = spans['min'].to_numpy()
+    summary['Last Year'] = spans['max'].to_numpy()
+    latest = df.iloc[latest_rows][[col for col in LATEST_COLS if col in df.columns]]
+    for col in latest.columns:
+        summary[col] = latest[col].array
+    return summary
+
+
+def update_athlete_summary(summary, df, names):
+    # re-derive only the given athletes' rows from their current rows in df;
+    # an athlete with no rows left is removed
+    names = pd.Index(names).unique()
+    rows = df[df['Name'].isin(names)]
+    patched = build_athlete_summary(rows) if len(rows) else summary.iloc[:0]
+    keep = summary[~summary.index.isin(names)]
+    out = pd.concat([keep, patched])
+    # concat falls back to object for categoricals whose dictionaries differ;
+    # restore the dtypes build_athlete_summary(df) would give
+    out.index = pd.Index(out.index, dtype=df['Name'].dtype, name='Name')
+    for col in LATEST_COLS:
+        if col in out.columns:
+            out[col] = out[col].astype(df[col].dtype)
+    return out.sort_index()
+
+
+def global_leaderboard(summary, k=DEFAULT_K, order='total'):
+    # all-time ranking straight from the summary counts, no row scan; only
+    # medallists are ranked, like leaderboard_table()
+    medallists = summary[summary['Total'] > 0]
+    return top_k(medallists.index.to_numpy(dtype=object), medallists[MEDALS].to_numpy(), k, order)
@@ -0,0 +1,380 @@
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+from athlete_index import AthleteIndex
+from athlete_summary import build_athlete_summary
+from cleaning import clean_data
+from cube import MedalCube
+from engine import OlympicsEngine
+from filter_index import FilterIndex
+from figures import athlete_timeline, medals_per_year, sport_medals
+from leaderboard import leaderboard_table
+from parallel import clean_data_parallel
+from shared_store import attach
+from snapshot import write_snapshot
+
+# -----------------------------------------------------------------------------
+# Headless benchmark of the load/clean/filter/render pipeline
+# -----------------------------------------------------------------------------
+# Generates Olympic-style CSVs (same columns and roughly the same cardinalities
+# as dataset2.csv), runs every pipeline stage without Streamlit and writes wall
+# time, peak RSS and Python/NumPy allocations per stage as JSON:
+#
+#   python benchmark.py --sizes 10k,270k,5M --out bench.json
+#   python benchmark.py --sizes 270k --compare bench.json   # fail on slowdowns
+#   python benchmark.py --sizes 5M --workers 1,2,4,8,16     # multi-core cleaning scaling
+#   python benchmark.py --sizes 270k,5M --selectivity       # filter latency vs. share of rows matched
+BENCH_DIR = ".bench_data"
+DEFAULT_SIZES = ['10k', '270k', '5M']
+DEFAULT_SLOWDOWN = 1.25
+SEED = 2016
+
+N_SPORTS, N_EVENTS, N_NOCS, N_TEAMS, N_CITIES = 66, 765, 230, 1180, 42
+MEDAL_P = {'Gold': 0.049, 'Silver': 0.048, 'Bronze': 0.050}
+# share of the sports selected in the selectivity sweep (every year and medal)
+SPORT_SHARES = [0.02, 0.1, 0.25, 0.5, 0.75, 1.0]
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+# ---- synthetic data ---------------------------------------------------------
+def _names(rng, n):
+    syllables = np.array(['an', 'be', 'ka', 'lo', 'mi', 'ra', 'so', 'ta', 'vi', 'zu',
+                          'el', 'or', 'in', 'de', 'gu', 'ha', 'jo', 'ne', 'pe', 'sh'])
+    parts = []
+    for length in (2, 3):
+        idx = rng.integers(0, len(syllables), (n, length))
+        parts.append(pd.Series(syllables[idx].tolist()).str.join('').str.capitalize())
+    names = parts[0] + ' ' + parts[1] + ' ' + pd.Series(np.arange(n)).map(lambda i: _alpha(i))
+    # ~0.5% of names fail the validation regex, like the real file
+    bad = rng.random(n) < 0.005
+    names[bad] = names[bad] + ' ' + pd.Series(rng.integers(1, 9, bad.sum())).astype(str).to_numpy()
+    return names.to_numpy(dtype=object)
+
+
+def _alpha(i):
+    out = ''
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 26)
+        out = chr(97 + r) + out
+    return out.capitalize()
+
+
+def generate_dataset(rows, seed=SEED):
+    rng = np.random.default_rng(seed)
+    n_athletes = max(rows // 2, 1)
+    athletes = pd.DataFrame({
+        'Name': _names(rng, n_athletes),
+        'Sex': rng.choice(['M', 'F'], n_athletes, p=[0.72, 0.28]),
+        'NOC': rng.integers(0, N_NOCS, n_athletes),
+        'Height': rng.normal(176, 10, n_athletes).round(),
+        'Weight': rng.normal(71, 14, n_athletes).round(),
+        'born': rng.integers(1870, 2000, n_athletes),
+        'Sport': rng.zipf(1.6, n_athletes) % N_SPORTS,
+    })
+    athletes['ID'] = np.arange(1, n_athletes + 1)
+
+    pick = rng.integers(0, n_athletes, rows)
+    df = athletes.iloc[pick].reset_index(drop=True)
+    games = np.arange(1896, 2017, 2)
+    df['Year'] = np.clip(df['born'] + rng.integers(16, 36, rows), 1896, 2016)
+    df['Year'] = games[np.searchsorted(games, df['Year'].to_numpy()).clip(0, len(games) - 1)]
+    df['Season'] = np.where(df['Year'] % 4 == 0, 'Summer', 'Winter')
+    df['Age'] = (df['Year'] - df['born']).astype(float)
+    df['City'] = 'City ' + (df['Year'] % N_CITIES).astype(str)
+    df['Games'] = df['Year'].astype(str) + ' ' + df['Season']
+    df['Team'] = 'Team ' + ((df['NOC'] * 5 + rng.integers(0, 5, rows)) % N_TEAMS).astype(str)
+    df['region'] = 'Region ' + df['NOC'].astype(str)
+    df['NOC'] = 'N' + df['NOC'].astype(str).str.zfill(3)
+    events_per_sport = N_EVENTS // N_SPORTS
+    df['Event'] = 'Sport ' + df['Sport'].astype(str) + ' Event ' + \
+        pd.Series(rng.integers(0, events_per_sport, rows)).astype(str)
+    df['Sport'] = 'Sport ' + df['Sport'].astype(str)
+
+    medal_p = list(MEDAL_P.values())
+    df['Medal'] = rng.choice(list(MEDAL_P) + [None], rows, p=medal_p + [1 - sum(medal_p)])
+    for col, share in [('Age', 0.035), ('Height', 0.22), ('Weight', 0.23), ('region', 0.001)]:
+        df.loc[rng.random(rows) < share, col] = np.nan
+    df['notes'] = np.nan
+
+    return df[['ID', 'Name', 'Sex', 'Age', 'Height', 'Weight', 'Team', 'NOC', 'Games', 'Year',
+               'Season', 'City', 'Sport', 'Event', 'Medal', 'region', 'notes']]
+
+
+def dataset_path(rows, bench_dir=BENCH_DIR):
+    os.makedirs(bench_dir, exist_ok=True)
+    path = os.path.join(bench_dir, f"olympics_{rows}.csv")
+    if not os.path.exists(path):
+        generate_dataset(rows).to_csv(path, index=False)
+    return path
+
+
+# ---- measurement ------------------------------------------------------------
+def current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, interval=0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            rss = current_rss()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        rss = current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+        return self.peak
+
+
+def measure(fn, repeat=1, trace_alloc=True):
+    result = None
+    walls = []
+    gc.collect()
+    sampler = RssSampler()
+    sampler.start()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        walls.append(time.perf_counter() - start)
+    peak_rss = sampler.stop()
+
+    stats = {'wall_s': min(walls), 'wall_s_all': walls, 'peak_rss_bytes': peak_rss}
+    if trace_alloc:
+        # separate run: tracemalloc slows allocation-heavy code down a lot
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats.update({'alloc_peak_bytes': peak, 'alloc_retained_bytes': current})
+    return result, stats
+
+
+# ---- pipeline stages --------------------------------------------------------
+def default_filter(df):
+    # the dashboard's initial sidebar state: every year, first 5 sports, every medal
+    sports = sorted(df['Sport'].dropna().unique())[:5]
+    return (int(df['Year'].min()), int(df['Year'].max())), sports, ['gold', 'silver', 'bronze', 'no medal']
+
+
+def run_pipeline(csv_path, repeat=1, trace_alloc=True):
+    results = {}
+
+    def stage(name, fn):
+        value, results[name] = measure(fn, repeat, trace_alloc)
+        return value
+
+    raw = stage('csv_parse', lambda: pd.read_csv(csv_path))
+    df = stage('clean', lambda: clean_data(raw.copy()))
+    del raw
+
+    snapshot_dir = os.path.join(BENCH_DIR, 'snapshots')
+    path = stage('snapshot_write', lambda: write_snapshot(df, csv_path, snapshot_dir))
+    df = stage('snapshot_attach', lambda: attach(path))
+
+    cube = stage('build_cube', lambda: MedalCube.from_frame(df))
+    index = stage('build_athlete_index', lambda: AthleteIndex.from_frame(df))
+    summary = stage('build_athlete_summary', lambda: build_athlete_summary(df))
+
+    year_range, sports, medals = default_filter(df)
+    # the same row filter the dashboards use (no QueryCache involved)
+    selection = OlympicsEngine(df).filter(year_range, sports, medals)
+    filtered = stage('filter_mask', selection.frame)
+    stage('overview', lambda: (
+        cube.medal_totals(year_range, sports, medals),
+        cube.distinct_athletes(year_range, sports, medals),
+        cube.count_by_year(year_range, sports, medals),
+        cube.count_by_sport(year_range, sports, medals),
+    ))
+    stage('leaderboard', lambda: leaderboard_table(filtered))
+
+    star = summary['Total'].idxmax()
+    stage('athlete_profile', lambda: (summary.loc[star], df.iloc[index.rows(star)]))
+
+    # figure build + the JSON Streamlit ships to the browser, uncached
+    payload = stage('charts', lambda: chart_payloads(cube, year_range, sports, medals, df.iloc[index.rows(star)]))
+    results['charts']['payload_bytes'] = payload
+    return results
+
+
+def chart_payloads(cube, year_range, sports, medals, events):
+    colors = {'gold': '#FFD700', 'silver': '#C0C0C0', 'bronze': '#CD7F32', 'no medal': '#E0E0E0'}
+    sport_counts = cube.count_by_sport(year_range, sports, medals)
+    figures = [
+        medals_per_year(cube.count_by_year(year_range, sports, medals), colors, "Medals per Year"),
+        sport_medals(sport_counts[sport_counts['Count'] > 0], sorted(sports), colors, "Sports"),
+        athlete_timeline(events, colors, "Timeline", "Year", "Sport"),
+    ]
+    return sum(len(pio.to_json(fig, validate=False)) for fig in figures)
+
+
+def pandas_mask(df, year_range, sports, medals):
+    # the column-scan filter the bitmap index replaces
+    return ((df['Year'] >= year_range[0]) & (df['Year'] <= year_range[1]) &
+            df['Sport'].isin(sports) & df['Medal'].isin(medals)).to_numpy()
+
+
+def selectivity_filters(df):
+    # (label, year_range, sports, medals) from a single-point query up to everything
+    years = (int(df['Year'].min()), int(df['Year'].max()))
+    sports = sorted(df['Sport'].dropna().unique())
+    medals = ['gold', 'silver', 'bronze', 'no medal']
+    last = int(df['Year'].max())
+    filters = [('point', (last, last), sports[:1], ['gold'])]
+    for share in SPORT_SHARES:
+        filters.append((f'sports{int(share * 100)}', years, sports[:max(1, round(share * len(sports)))], medals))
+    return filters
+
+
+def run_selectivity(csv_path, repeat=1):
+    # filter latency as a function of the share of rows matched: the pandas
+    # column scan against the bitmap index (mask and popcount)
+    df = attach(write_snapshot(clean_data(pd.read_csv(csv_path)), csv_path, os.path.join(BENCH_DIR, 'snapshots')))
+    index, results = None, {}
+    index, results['build_filter_index'] = measure(lambda: FilterIndex.from_frame(df), repeat, trace_alloc=False)
+    results['build_filter_index']['index_bytes'] = index.nbytes
+    for label, year_range, sports, medals in selectivity_filters(df):
+        matched = index.count(year_range, sports, medals)
+        for method, fn in [('pandas', lambda: pandas_mask(df, year_range, sports, medals)),
+                           ('bitmap', lambda: index.mask(year_range, sports, medals)),
+                           ('bitmap_count', lambda: index.count(year_range, sports, medals))]:
+            _, stats = measure(fn, repeat, trace_alloc=False)
+            stats.update({'selectivity': matched / len(df), 'matched_rows': matched})
+            results[f'filter_{label}_{method}'] = stats
+    return results
+
+
+def print_selectivity(rows, stages):
+    print(f"{rows:>9,} rows: filter latency by selectivity (ms)", file=sys.stderr)
+    print(f"{'filter':<12} {'selectivity':>11} {'pandas':>9} {'bitmap':>9} {'count':>9}", file=sys.stderr)
+    labels = [name[len('filter_'):-len('_pandas')] for name in stages if name.startswith('filter_') and name.endswith('_pandas')]
+    for label in labels:
+        row = [stages[f'filter_{label}_{m}'] for m in ('pandas', 'bitmap', 'bitmap_count')]
+        print(f"{label:<12} {row[0]['selectivity']:>11.4f} " + ' '.join(f"{r['wall_s'] * 1000:>9.3f}" for r in row),
+              file=sys.stderr)
+
+
+def run_scaling(csv_path, workers, repeat=1):
+    # clean_data_parallel() per worker count, forced past the serial fallback;
+    # no tracemalloc pass since the work happens in child processes
+    raw = pd.read_csv(csv_path)
+    results = {}
+    for n in workers:
+        _, results[f'clean_parallel_w{n}'] = measure(
+            lambda: clean_data_parallel(raw.copy(), workers=n, min_rows=0), repeat, trace_alloc=False)
+    return results
+
+
+# ---- reporting --------------------------------------------------------------
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_SLOWDOWN):
+    # returns the (rows, stage, ratio) entries that got slower than threshold
+    old = {(r['rows'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    for r in current['results']:
+        ref = old.get((r['rows'], r['stage']))
+        if not ref or not ref['wall_s']:
+            continue
+        ratio = r['wall_s'] / ref['wall_s']
+        print(f"{r['rows']:>9,} {r['stage']:<24} {ref['wall_s']:>9.4f}s -> {r['wall_s']:>9.4f}s  x{ratio:.2f}")
+        if ratio > threshold:
+            regressions.append((r['rows'], r['stage'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Olympic dashboard pipeline headlessly.")
+    parser.add_argument('--sizes', default=','.join(DEFAULT_SIZES), help="comma separated row counts, e.g. 10k,270k,5M")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per stage (min is reported)")
+    parser.add_argument('--no-alloc', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--out', help="write JSON results here (default: stdout)")
+    parser.add_argument('--compare', help="baseline JSON; exit 1 if any stage is slower than --threshold")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_SLOWDOWN)
+    parser.add_argument('--workers', help="comma separated worker counts for the parallel cleaning scaling run, e.g. 1,2,4,8,16")
+    parser.add_argument('--selectivity', action='store_true',
+                        help="also time the sidebar filter (pandas scan vs. bitmap index) across selectivities")
+    args = parser.parse_args(argv)
+
+    report = {'environment': environment(), 'results': []}
+    for size in args.sizes.split(','):
+        rows = parse_size(size)
+        stages = run_pipeline(dataset_path(rows), args.repeat, not args.no_alloc)
+        if args.workers:
+            workers = [int(n) for n in args.workers.split(',')]
+            stages.update(run_scaling(dataset_path(rows), workers, args.repeat))
+        if args.selectivity:
+            sweep = run_selectivity(dataset_path(rows), args.repeat)
+            print_selectivity(rows, sweep)
+            stages.update(sweep)
+        for name, stats in stages.items():
+            report['results'].append({'rows': rows, 'stage': name, **stats})
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} stage(s) slower than x{args.threshold}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
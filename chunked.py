@@ -0,0 +1,196 @@
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from cleaning import (COMPACT_CATEGORY_COLS, COMPACT_DTYPES, IMPUTE_COLS, apply_row_rules, category_columns,
+                      compact_frame, fill_medians, fits, median_tables, new_median_counts, update_median_counts)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# -----------------------------------------------------------------------------
+# Chunked (bounded-memory) ingestion
+# -----------------------------------------------------------------------------
+# Same rules as cleaning.clean_data(), for CSVs that do not fit in RAM:
+#   pass 1 - row rules per chunk, collect category dictionaries, exact
+#            per-(Sex, Sport, value) counts for the median imputation and the
+#            range / missing values of the integer columns
+#   pass 2 - row rules again, impute from the pass-1 medians, cast to the merged
+#            categories, drop duplicates against a uint64 row-hash index kept
+#            as sorted runs (RowHashIndex) and apply the compact dtypes
+#            clean_data() picks for the whole file, the same in every chunk
+# Only one chunk plus the small aggregates are alive at a time.
+DEFAULT_MEMORY_BUDGET_MB = 256
+# raw chunk + row-rule copies + imputation arrays + hashes
+WORKING_SET_FACTOR = 6
+MIN_CHUNKSIZE = 1_000
+_SAMPLE_ROWS = 2_000
+_STRING_COLS = ['Name', 'Medal', 'region', 'Sex', 'Season', 'Team', 'NOC', 'Sport', 'Event', 'City']
+
+
+def read_options(csv_path):
+    header = pd.read_csv(csv_path, nrows=0).columns
+    # pin string columns to object so a chunk that happens to be all-NaN still
+    # supports the .str accessor
+    return {'dtype': {col: 'object' for col in _STRING_COLS if col in header}}
+
+
+def estimate_chunksize(csv_path, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    sample = pd.read_csv(csv_path, nrows=_SAMPLE_ROWS, **read_options(csv_path))
+    if sample.empty:
+        return MIN_CHUNKSIZE
+    bytes_per_row = sample.memory_usage(deep=True).sum() / len(sample)
+    budget = memory_budget_mb * 1024 * 1024
+    return max(MIN_CHUNKSIZE, int(budget // (bytes_per_row * WORKING_SET_FACTOR)))
+
+
+def _update_bounds(bounds, chunk):
+    # per COMPACT_DTYPES column: (dtype of the column so far, min / max and a
+    # NaN if any, as seen over every chunk)
+    for col in COMPACT_DTYPES:
+        if col in chunk.columns:
+            dtype, extremes = bounds.get(col, (chunk[col].dtype, []))
+            values = chunk[col].dropna()
+            if len(values):
+                extremes += [values.min(), values.max()]
+            if len(values) < len(chunk):
+                extremes.append(np.nan)
+            bounds[col] = np.result_type(dtype, chunk[col].dtype), extremes
+
+
+def numeric_dtypes(bounds):
+    # the dtype compact_frame() gives each column of the concatenated file
+    numeric = {}
+    for col, (dtype, extremes) in bounds.items():
+        target = COMPACT_DTYPES[col]
+        numeric[col] = target if fits(pd.Series(extremes, dtype='float64'), target) else dtype
+    return numeric
+
+
+def _iter_row_chunks(csv_path, chunksize, stats):
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, **read_options(csv_path)):
+        stats['peak_chunk_bytes'] = max(stats['peak_chunk_bytes'], int(chunk.memory_usage(deep=True).sum()))
+        yield apply_row_rules(chunk)
+
+
+# ---- pass 2: dedup against a row-hash index ---------------------------------
+class RowHashIndex:
+    # Hashes of the rows kept so far, as sorted runs merged like a binary
+    # counter (a run is merged into the previous one while that one is no
+    # larger). A chunk costs one sort of its own hashes plus amortized
+    # O(log chunks) merge work per hash, instead of re-sorting the whole index,
+    # and a lookup is one searchsorted per run (at most log2(chunks) runs).
+    def __init__(self):
+        self.runs = []
+
+    @property
+    def nbytes(self):
+        return sum(run.nbytes for run in self.runs)
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            pos = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[pos] == hashes
+        return found
+
+    def add(self, hashes):
+        # hashes must be unique and not in the index yet
+        run = np.sort(hashes)
+        while self.runs and len(self.runs[-1]) <= len(run):
+            # two sorted runs: the stable (tim)sort merges them in linear time
+            run = np.sort(np.concatenate([self.runs.pop(), run]), kind='stable')
+        if len(run):
+            self.runs.append(run)
+
+
+def _drop_seen(chunk, seen):
+    hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+    keep = ~pd.Series(hashes).duplicated().to_numpy()
+    keep &= ~seen.contains(hashes)
+    seen.add(hashes[keep])
+    return chunk[keep]
+
+
+def iter_clean_chunks(csv_path, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, chunksize=None, stats=None):
+    stats = {} if stats is None else stats
+    stats.update({
+        'memory_budget_mb': memory_budget_mb,
+        'chunksize': chunksize or estimate_chunksize(csv_path, memory_budget_mb),
+        'chunks': 0, 'rows_valid': 0, 'rows_out': 0,
+        'peak_chunk_bytes': 0, 'hash_index_bytes': 0, 'max_rss_bytes': None,
+    })
+    chunksize = stats['chunksize']
+
+    # pass 1: category dictionaries and median counts
+    categories, bounds, cols = {}, {}, None
+    counts = {}
+    for chunk in _iter_row_chunks(csv_path, chunksize, stats):
+        if cols is None:
+            cols = [col for col in IMPUTE_COLS if col in chunk.columns]
+            counts = new_median_counts(cols)
+        for col in category_columns(chunk) + [c for c in COMPACT_CATEGORY_COLS if c in chunk.columns]:
+            categories.setdefault(col, set()).update(chunk[col].dropna().unique())
+        update_median_counts(counts, chunk, cols)
+        _update_bounds(bounds, chunk)
+
+    if cols is None:
+        return
+    tables, global_medians = median_tables(counts, cols)
+    dtypes = {col: pd.CategoricalDtype(sorted(values)) for col, values in categories.items()}
+    numeric = numeric_dtypes(bounds)
+
+    # pass 2: impute, cast, de-duplicate, compact
+    seen = RowHashIndex()
+    for chunk in _iter_row_chunks(csv_path, chunksize, stats):
+        stats['chunks'] += 1
+        stats['rows_valid'] += len(chunk)
+        chunk = fill_medians(chunk, cols, tables, global_medians)
+        chunk = chunk.astype({col: dtypes[col] for col in category_columns(chunk)})
+        chunk = _drop_seen(chunk, seen)
+        chunk = compact_frame(chunk, dtypes, numeric)
+        stats['rows_out'] += len(chunk)
+        stats['hash_index_bytes'] = int(seen.nbytes)
+        if resource is not None:
+            # ru_maxrss is KiB on Linux
+            stats['max_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        yield chunk
+
+
+def clean_csv_chunked(csv_path, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, chunksize=None):
+    stats = {}
+    chunks = list(iter_clean_chunks(csv_path, memory_budget_mb, chunksize, stats))
+    df = pd.concat(chunks) if chunks else pd.DataFrame()
+    return df, stats
+
+
+def clean_csv_to_arrow(csv_path, out_path, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, chunksize=None):
+    # streams the cleaned chunks into an Arrow IPC file without ever holding
+    # the full frame; every chunk shares the merged category dictionaries
+    stats, writer = {}, None
+    try:
+        for chunk in iter_clean_chunks(csv_path, memory_budget_mb, chunksize, stats):
+            table = pa.Table.from_pandas(chunk, preserve_index=True)
+            if writer is None:
+                writer = pa.ipc.new_file(out_path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Clean a large Olympic CSV in bounded memory.")
+    parser.add_argument('csv_path')
+    parser.add_argument('out_path', help="Arrow IPC file to write")
+    parser.add_argument('--memory-mb', type=int, default=DEFAULT_MEMORY_BUDGET_MB)
+    parser.add_argument('--chunksize', type=int, default=None)
+    args = parser.parse_args()
+
+    print(json.dumps(clean_csv_to_arrow(args.csv_path, args.out_path, args.memory_mb, args.chunksize), indent=2))
@@ -0,0 +1,302 @@
+import logging
+import sys
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# -----------------------------------------------------------------------------
+# Cleaning rules for dataset2.csv
+# -----------------------------------------------------------------------------
+# Bump CLEANING_VERSION whenever a rule below changes, so persisted snapshots
+# built with the old rules are rebuilt on the next load.
+CLEANING_VERSION = 3
+
+NAME_PATTERN = r'^[^\W\d_]+(?:[ \.\-][^\W\d_]+)*$'
+# NAME_PATTERN restricted to ASCII input, for Arrow's RE2 (whose \w is ASCII
+# only); \n? matches what Python's $ accepts before a trailing newline
+ASCII_NAME_PATTERN = r'^[A-Za-z]+(?:[ .\-][A-Za-z]+)*\n?$'
+CAT_COLS = ['Sex', 'Season', 'Team', 'NOC', 'Sport', 'Event', 'City']
+IMPUTE_COLS = ['Age', 'Height', 'Weight']
+# fallback order for median imputation: (Sex, Sport) -> Sex -> whole column
+IMPUTE_LEVELS = [['Sex', 'Sport'], ['Sex']]
+# memory-optimization stage: high-repeat strings become categoricals and
+# numerics are downcast (integer targets only when every value fits)
+COMPACT_CATEGORY_COLS = ['Name', 'region', 'Games']
+COMPACT_DTYPES = {'ID': 'int32', 'Year': 'uint16', 'Age': 'float32', 'Height': 'float32', 'Weight': 'float32'}
+
+logger = logging.getLogger(__name__)
+
+
+def _fill_from_group_medians(values, df, keys, cols):
+    frame = pd.DataFrame(values, columns=cols, index=df.index)
+    grouped = frame.groupby([df[key] for key in keys], observed=True, sort=True)
+    # one cythonized aggregation for every column, plus a trailing NaN row
+    # that rows with a missing key are pointed at
+    medians = grouped.median().to_numpy(dtype='float64')
+    medians = np.vstack([medians, np.full((1, len(cols)), np.nan)])
+
+    group_ids = grouped.ngroup().to_numpy()
+    missing_key = np.isnan(group_ids)
+    group_ids = np.where(missing_key, len(medians) - 1, group_ids).astype(np.intp)
+
+    filled = np.where(np.isnan(values), medians[group_ids], values)
+    # groupby().transform() drops NaN-keyed rows, so their values end up NaN
+    filled[missing_key] = np.nan
+    return filled
+
+
+def impute_medians(df, cols=None):
+    if cols is None:
+        cols = [col for col in IMPUTE_COLS if col in df.columns]
+    if not cols:
+        return df
+
+    # each level fills from the values left by the previous one, exactly like
+    # the chained transform(lambda x: x.fillna(x.median())) calls it replaces
+    values = df[cols].to_numpy(dtype='float64', copy=True)
+    for keys in IMPUTE_LEVELS:
+        values = _fill_from_group_medians(values, df, keys, cols)
+
+    df[cols] = values
+    df[cols] = df[cols].fillna(df[cols].median())
+    return df
+
+
+# ---- median imputation from value counts ------------------------------------
+# The same cascade as impute_medians(), for data that is only ever seen in
+# pieces (chunked.py reads chunks, parallel.py splits the frame across
+# workers, incremental.py adds appended rows). Each piece adds its
+# per-(Sex, Sport, value) counts; median_tables() replays the cascade on the
+# merged counts, so the medians are exact, not estimates, and fill_medians()
+# applies them. tests/test_cleaning.py holds both paths to the original
+# chained transforms.
+def _key(value):
+    return None if pd.isna(value) else value
+
+
+def new_median_counts(cols):
+    return {col: Counter() for col in cols}
+
+
+def update_median_counts(counts, df, cols):
+    # add df's rows to counts[col][(Sex, Sport, value)]; None stands for NaN
+    for col in cols:
+        sizes = df.groupby(['Sex', 'Sport', col], dropna=False, sort=False).size()
+        acc = counts[col]
+        for (sex, sport, value), n in sizes.items():
+            acc[(_key(sex), _key(sport), _key(value))] += int(n)
+
+
+def _median_from_counts(counts):
+    counts = {v: n for v, n in counts.items() if n}
+    if not counts:
+        return np.nan
+    values = np.array(sorted(counts), dtype='float64')
+    cum = np.cumsum([counts[v] for v in values])
+    n = cum[-1]
+    lo = values[np.searchsorted(cum, (n - 1) // 2, side='right')]
+    hi = values[np.searchsorted(cum, n // 2, side='right')]
+    return (lo + hi) / 2
+
+
+def _cascade_medians(counts):
+    # Rebuild the (Sex, Sport) -> Sex -> global fallback of impute_medians()
+    # from value counts: every level sees the values filled by the one before,
+    # and a row with a missing key is NaN until the next level fills it.
+    groups = {}
+    for (sex, sport, value), n in counts.items():
+        groups.setdefault((sex, sport), Counter())[value] += n
+
+    level1, by_sex = {}, {}
+    for (sex, sport), values in groups.items():
+        if sex is None:
+            continue
+        filled = by_sex.setdefault(sex, Counter())
+        if sport is None:
+            filled[None] += sum(values.values())
+            continue
+        median = _median_from_counts({v: n for v, n in values.items() if v is not None})
+        level1[(sex, sport)] = median
+        for value, n in values.items():
+            filled[median if value is None and not np.isnan(median) else value] += n
+
+    level2, overall = {}, Counter()
+    for sex, values in by_sex.items():
+        median = _median_from_counts({v: n for v, n in values.items() if v is not None})
+        level2[sex] = median
+        for value, n in values.items():
+            overall[median if value is None and not np.isnan(median) else value] += n
+
+    overall.pop(None, None)
+    return [level1, level2], _median_from_counts(overall)
+
+
+def median_tables(counts, cols):
+    # (per-level median tables indexed like IMPUTE_LEVELS, global medians)
+    per_col = {col: _cascade_medians(counts[col]) for col in cols}
+    tables = []
+    for level, keys in enumerate(IMPUTE_LEVELS):
+        index = sorted({k for col in cols for k in per_col[col][0][level]})
+        if len(keys) > 1:
+            index = pd.MultiIndex.from_tuples(index, names=keys) if index else \
+                pd.MultiIndex.from_arrays([[]] * len(keys), names=keys)
+        else:
+            index = pd.Index(index, dtype='object', name=keys[0])
+        tables.append(pd.DataFrame(
+            {col: [per_col[col][0][level].get(k, np.nan) for k in index] for col in cols},
+            index=index, dtype='float64'))
+    global_medians = np.array([per_col[col][1] for col in cols], dtype='float64')
+    return tables, global_medians
+
+
+def fill_medians(df, cols, tables, global_medians):
+    # impute_medians() with precomputed medians; fills df in place
+    values = df[cols].to_numpy(dtype='float64', copy=True)
+    for keys, table in zip(IMPUTE_LEVELS, tables):
+        key_frame = df[keys]
+        missing_key = key_frame.isna().any(axis=1).to_numpy()
+        if len(keys) > 1:
+            lookup = pd.MultiIndex.from_frame(key_frame)
+        else:
+            lookup = pd.Index(key_frame[keys[0]])
+        medians = table.reindex(lookup).to_numpy(dtype='float64')
+        values = np.where(np.isnan(values), medians, values)
+        values[missing_key] = np.nan
+    values = np.where(np.isnan(values), global_medians, values)
+    df[cols] = values
+    return df
+
+
+def _valid_unique_names(uniques):
+    # pure-ASCII names go through Arrow (RE2), the rest through Python's re
+    ok = np.zeros(len(uniques), dtype=bool)
+    try:
+        arr = pa.array(uniques, type=pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # non-string values mixed in: validate everything with re
+        return pd.Series(uniques, dtype=object).str.match(NAME_PATTERN, na=False).to_numpy(dtype=bool)
+    ascii_mask = pc.string_is_ascii(arr).to_numpy(zero_copy_only=False)
+    ok[ascii_mask] = pc.match_substring_regex(arr.filter(ascii_mask), ASCII_NAME_PATTERN).to_numpy(zero_copy_only=False)
+    rest = ~ascii_mask
+    if rest.any():
+        ok[rest] = pd.Series(uniques[rest], dtype=object).str.match(NAME_PATTERN, na=False).to_numpy(dtype=bool)
+    return ok
+
+
+def validate_names(names, report=False):
+    # each distinct name is checked once and the result spread back by code;
+    # report=True also returns the rejected names (first-seen order, NaN
+    # included) with their row counts, from the same codes
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        codes, uniques = names.cat.codes.to_numpy(), names.cat.categories.to_numpy(dtype=object)
+    else:
+        codes, uniques = pd.factorize(names)
+        uniques = np.asarray(uniques, dtype=object)
+    ok = _valid_unique_names(uniques)
+    mask = np.where(codes >= 0, ok[codes], False)
+    mask = pd.Series(mask, index=names.index, name=names.name)
+    if not report:
+        return mask
+
+    rows_per_name = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    rejected = pd.DataFrame({'Name': uniques[~ok], 'rows': rows_per_name[~ok]})
+    rejected = rejected[rejected['rows'] > 0]
+    missing = int(np.count_nonzero(codes < 0))
+    if missing:
+        rejected = pd.concat([rejected, pd.DataFrame({'Name': [np.nan], 'rows': [missing]})])
+    return mask, rejected.reset_index(drop=True)
+
+
+def apply_row_rules(df):
+    # rules that only look at one row at a time, so they can also run chunk by
+    # chunk (see chunked.py); Medal stays a plain string column here
+    if 'notes' in df.columns: df = df.drop(columns=['notes'])
+    if 'Name' in df.columns:
+        if logger.isEnabledFor(logging.INFO):
+            valid, rejected = validate_names(df['Name'], report=True)
+            logger.info("name validation: %d rows rejected (%d distinct names)", rejected['rows'].sum(), len(rejected))
+        else:
+            valid = validate_names(df['Name'])
+        df = df[valid]
+
+    df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
+
+    df['Medal'] = df['Medal'].astype(str).str.strip().str.lower()
+    df['Medal'] = df['Medal'].replace({'no medal': np.nan, '-': np.nan, 'nan': np.nan})
+    df['Medal'] = df['Medal'].fillna('no medal')
+
+    if 'region' in df.columns: df['region'] = df['region'].fillna('Unknown')
+
+    df.loc[(df['Age'] > 75) | (df['Age'] < 10), 'Age'] = np.nan
+    if 'Height' in df.columns: df.loc[(df['Height'] > 250) | (df['Height'] < 120), 'Height'] = np.nan
+    if 'Weight' in df.columns: df.loc[(df['Weight'] > 200) | (df['Weight'] < 25), 'Weight'] = np.nan
+    return df
+
+
+def category_columns(df):
+    return [col for col in CAT_COLS + ['Medal'] if col in df.columns]
+
+
+def fits(series, dtype):
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'f':
+        return True
+    if series.isna().any():
+        return False
+    info = np.iinfo(dtype)
+    return series.empty or (series.min() >= info.min and series.max() <= info.max)
+
+
+def compact_frame(df, categories=None, numeric=None):
+    # categories: optional {col: CategoricalDtype} and numeric: optional
+    # {col: dtype} for the COMPACT_DTYPES columns, so chunked ingestion can
+    # give every chunk the dictionaries and dtypes decided over the whole file
+    categories = categories or {}
+    dtypes = {col: categories.get(col, 'category') for col in COMPACT_CATEGORY_COLS if col in df.columns}
+    if numeric is None:
+        numeric = {col: dtype for col, dtype in COMPACT_DTYPES.items() if col in df.columns and fits(df[col], dtype)}
+    dtypes.update({col: dtype for col, dtype in numeric.items() if col in df.columns})
+    return df.astype(dtypes)
+
+
+def memory_report(before, after):
+    report = pd.DataFrame({
+        'before_bytes': before.memory_usage(deep=True, index=False),
+        'after_bytes': after.memory_usage(deep=True, index=False),
+        'before_dtype': before.dtypes.astype(str),
+        'after_dtype': after.dtypes.astype(str),
+    })
+    report.loc['TOTAL', ['before_bytes', 'after_bytes']] = report[['before_bytes', 'after_bytes']].sum()
+    return report.astype({'before_bytes': 'int64', 'after_bytes': 'int64'})
+
+
+def clean_data(df, report=False):
+    df = apply_row_rules(df)
+    existing_cat_cols = category_columns(df)
+    df[existing_cat_cols] = df[existing_cat_cols].astype('category')
+
+    df = impute_medians(df)
+
+    df.drop_duplicates(inplace=True)
+
+    compact = compact_frame(df)
+    if report or logger.isEnabledFor(logging.INFO):
+        mem = memory_report(df, compact)
+        logger.info("cleaned frame: %d -> %d bytes", mem.loc['TOTAL', 'before_bytes'], mem.loc['TOTAL', 'after_bytes'])
+        if report:
+            return compact, mem
+    return compact
+
+
+def load_and_clean_csv(path):
+    return clean_data(pd.read_csv(path))
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else "dataset2.csv"
+    df, mem = clean_data(pd.read_csv(path), report=True)
+    print("Rows:", df.shape[0])
+    print(mem.to_string())
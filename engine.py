@@ -0,0 +1,217 @@
+import contextlib
+import threading
+
+from athlete_index import AthleteIndex
+from athlete_summary import build_athlete_summary, global_leaderboard, update_athlete_summary
+from cube import MedalCube
+from filter_index import FilterIndex
+from incremental import publish
+from leaderboard import DEFAULT_K, MEDALS, leaderboard_table
+from pagination import DEFAULT_PAGE_SIZE, SortIndex, page_rows
+from query_cache import QueryCache, filter_key
+from shared_store import SHARED_DIR, attach
+from snapshot import read_snapshot_meta
+
+# -----------------------------------------------------------------------------
+# Olympic analytics engine
+# -----------------------------------------------------------------------------
+# Everything the dashboards compute, without Streamlit: load the cleaned
+# dataset once, then answer filter / overview / leaderboard / athlete queries
+# from the derived structures (medal cube, athlete index, athlete summary),
+# which are built lazily on first use and shared by every caller. refreshed()
+# picks up rows appended to the CSV and patches those structures instead of
+# rebuilding them (see incremental.py).
+#
+#   engine = OlympicsEngine.load("dataset2.csv")
+#   selection = engine.filter((1990, 2016), ['Swimming'], ['gold'])
+#   selection.overview(); selection.leaderboard(k=10); engine.athlete("Michael Fred Phelps, II")
+#   selection.page(2, 50, sort_by='Name')   # one sorted window of the matching rows
+DATASET = "dataset2.csv"
+MEDAL_OPTIONS = MEDALS + ['no medal']
+TOP_SPORTS = 10
+
+
+def _snapshot_version(path):
+    return (read_snapshot_meta(path) or {}).get('snapshot.source_sha256')
+
+
+class Selection:
+    # one sidebar filter state; results are memoized in the engine's QueryCache
+    def __init__(self, engine, key):
+        self.engine = engine
+        self.key = key                # filter_key(year_range, sports, medals)
+
+    @property
+    def year_range(self):
+        return self.key[0], self.key[1]
+
+    @property
+    def sports(self):
+        return list(self.key[2])
+
+    @property
+    def medals(self):
+        return list(self.key[3])
+
+    def is_global(self):
+        # every year and sport with all three medals: the whole-dataset ranking applies
+        engine = self.engine
+        return (self.year_range == engine.year_bounds() and len(self.key[2]) == len(engine.sports())
+                and set(MEDALS) <= set(self.key[3]))
+
+    def mask(self):
+        # boolean row mask from the bitmap index (no full-column comparisons)
+        with self.engine.span('filter'):
+            return self.engine.filter_index.mask(self.year_range, self.key[2], self.key[3])
+
+    def count(self):
+        return self.engine.filter_index.count(self.year_range, self.key[2], self.key[3])
+
+    def frame(self):
+        return self.engine.df[self.mask()]
+
+    def rows(self, sort_by='Year', ascending=True):
+        # positions of every matching row in sort order, from the precomputed sort index
+        return self.engine.cache.get_or_compute(
+            ('rows', sort_by, ascending) + self.key,
+            lambda: self.engine.sort_index(sort_by).sort_mask(self.mask(), ascending))
+
+    def page(self, page=1, page_size=DEFAULT_PAGE_SIZE, sort_by='Year', ascending=True, columns=None):
+        # {'rows': the visible window, 'total', 'page', 'pages', 'start'}
+        with self.engine.span('page'):
+            return page_rows(self.engine.df, self.rows(sort_by, ascending), page, page_size, columns)
+
+    def overview(self):
+        return self.engine.cache.get_or_compute(('overview',) + self.key, self._compute_overview)
+
+    def _compute_overview(self):
+        cube = self.engine.cube
+        args = self.year_range, self.sports, self.medals
+        sport_counts = cube.count_by_sport(*args)
+        sport_total = sport_counts.groupby('Sport', observed=False)['Count'].sum().reset_index().sort_values('Count', ascending=False)
+        return {
+            'medal_totals': cube.medal_totals(*args),
+            'athletes': cube.distinct_athletes(*args),
+            'count_by_year': cube.count_by_year(*args),
+            'sport_counts': sport_counts,
+            'top_sports': sport_total.head(TOP_SPORTS)['Sport'].tolist(),
+        }
+
+    def leaderboard(self, k=DEFAULT_K, order='total'):
+        # frame indexed by Name: gold / silver / bronze / Total, best first
+        return self.engine.cache.get_or_compute(('leaderboard', k, order) + self.key,
+                                                lambda: self._compute_leaderboard(k, order))
+
+    def _compute_leaderboard(self, k, order):
+        if self.is_global():
+            # whole dataset: rank straight from the athlete summary, no row scan
+            return global_leaderboard(self.engine.summary, k=k, order=order)
+        return leaderboard_table(self.frame(), k=k, order=order)
+
+
+class OlympicsEngine:
+    def __init__(self, df, cache=None, tracer=None, version=None):
+        self.df = df
+        self.cache = cache if cache is not None else QueryCache()
+        self.tracer = tracer
+        self.version = version        # sha256 of the source CSV the snapshot was built from
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, csv_path=DATASET, store_dir=SHARED_DIR, **kwargs):
+        # cleaned frame via the shared snapshot (built once per host, then mmapped)
+        path, _ = publish(csv_path, store_dir)
+        return cls(attach(path), version=_snapshot_version(path), **kwargs)
+
+    def refreshed(self, csv_path=DATASET, store_dir=SHARED_DIR):
+        # self if the CSV is unchanged, otherwise a new engine on the new
+        # snapshot; after a pure append the derived structures already built
+        # here are patched rather than rebuilt
+        path, delta = publish(csv_path, store_dir)
+        version = _snapshot_version(path)
+        if delta is None and version == self.version:
+            return self
+        engine = OlympicsEngine(attach(path), QueryCache(self.cache.max_bytes), self.tracer, version)
+        if delta is not None and delta['mode'] == 'append':
+            engine._patch_from(self, delta)
+        return engine
+
+    def _patch_from(self, previous, delta):
+        start, stop = delta['new_rows']
+        cube = previous._derived.get('cube')
+        if cube is not None and not delta['dropped_old']:
+            self._derived['cube'] = cube.merge(MedalCube.from_frame(self.df.iloc[start:stop]))
+        summary = previous._derived.get('summary')
+        if summary is not None:
+            self._derived['summary'] = update_athlete_summary(summary, self.df, delta['names'])
+
+    def span(self, name):
+        return self.tracer.span(name) if self.tracer is not None else contextlib.nullcontext()
+
+    # ---- derived structures, built once on first use -------------------------
+    def _get(self, name, build):
+        if name not in self._derived:
+            with self._lock:
+                if name not in self._derived:
+                    self._derived[name] = build(self.df)
+        return self._derived[name]
+
+    @property
+    def cube(self):
+        return self._get('cube', MedalCube.from_frame)
+
+    @property
+    def athlete_index(self):
+        return self._get('athlete_index', AthleteIndex.from_frame)
+
+    @property
+    def summary(self):
+        return self._get('summary', build_athlete_summary)
+
+    @property
+    def filter_index(self):
+        return self._get('filter_index', FilterIndex.from_frame)
+
+    def sort_index(self, column):
+        return self._get(('sort', column), lambda df: SortIndex.from_column(df[column]))
+
+    # ---- queries ---------------------------------------------------------------
+    def year_bounds(self):
+        return self._get('year_bounds', lambda df: (int(df['Year'].min()), int(df['Year'].max())))
+
+    def sports(self):
+        return self._get('sports', lambda df: sorted(df['Sport'].dropna().unique()))
+
+    def filter(self, year_range=None, sports=None, medals=None):
+        # None means "no restriction" on that axis
+        return Selection(self, filter_key(year_range or self.year_bounds(),
+                                          self.sports() if sports is None else sports,
+                                          MEDAL_OPTIONS if medals is None else medals))
+
+    def overview(self):
+        return self.filter().overview()
+
+    def leaderboard(self, k=DEFAULT_K, order='total'):
+        return self.filter().leaderboard(k, order)
+
+    def search(self, query, limit=None):
+        if limit is None:
+            return self.athlete_index.search(query)
+        return self.athlete_index.search(query, limit)
+
+    def athlete(self, name):
+        # {'summary': career row of the athlete summary, 'events': their rows}, None if unknown
+        if name not in self.athlete_index:
+            return None
+        with self.span('profile_lookup'):
+            return {
+                'summary': self.summary.loc[name],
+                'events': self.df.iloc[self.athlete_index.rows(name)],
+            }
+
+    def athlete_events(self, name, page=1, page_size=DEFAULT_PAGE_SIZE, sort_by='Year', ascending=False,
+                       columns=None):
+        # one sorted window of an athlete's event log (same shape as Selection.page)
+        positions = self.sort_index(sort_by).sort_positions(self.athlete_index.rows(name), ascending)
+        return page_rows(self.df, positions, page, page_size, columns)
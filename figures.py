@@ -0,0 +1,123 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from query_cache import QueryCache
+
+# -----------------------------------------------------------------------------
+# Cached, compact Plotly figures
+# -----------------------------------------------------------------------------
+# The dashboard charts are built here with plain go.Bar / go.Scatter traces
+# straight from the aggregate's NumPy arrays (Plotly serializes those as
+# base64 typed arrays) instead of through Plotly Express, and with a slim copy
+# of the plotly_white template that only carries the layout plus the bar and
+# scatter defaults. Built figures are kept in a FigureCache keyed on the chart
+# builder, its parameters and a content hash of the input frame, so a rerun
+# over an unchanged aggregate reuses the figure; entries are sized by their
+# serialized JSON and evicted LRU within a byte budget.
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+_WHITE = pio.templates['plotly_white']
+SLIM_TEMPLATE = go.layout.Template(layout=_WHITE.layout, data={'bar': _WHITE.data.bar, 'scatter': _WHITE.data.scatter})
+BASE_LAYOUT = dict(template=SLIM_TEMPLATE, paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+                   font=dict(color="#000000"))
+# Plotly Express' default max marker size for size=
+PX_MAX_MARKER_SIZE = 20
+
+
+def content_hash(frame):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([str(col) for col in frame.columns]).encode())
+    h.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def figure_size(fig):
+    return len(pio.to_json(fig, validate=False))
+
+
+class FigureCache(QueryCache):
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(max_bytes, sizeof=figure_size)
+
+    def figure(self, builder, frame, **params):
+        # params must be JSON-serializable; they are part of the key
+        key = (builder.__name__, json.dumps(params, sort_keys=True, default=str), content_hash(frame))
+        return self.get_or_compute(key, lambda: builder(frame, **params))
+
+
+# ---- chart builders -----------------------------------------------------------
+def _long_to_columns(frame, x, color):
+    # long (x, color, Count) rows -> x values plus one Count array per color value
+    xs, x_idx = np.unique(frame[x].to_numpy(), return_inverse=True)
+    colors = frame[color]
+    order = colors.cat.categories if isinstance(colors.dtype, pd.CategoricalDtype) else pd.unique(colors)
+    color_idx = pd.Index(order).get_indexer(colors)
+    grid = np.zeros((len(order), len(xs)), dtype=np.int64)
+    np.add.at(grid, (color_idx, x_idx), frame['Count'].to_numpy())
+    present = np.bincount(color_idx, minlength=len(order)) > 0
+    return xs, [(value, grid[i]) for i, value in enumerate(order) if present[i]]
+
+
+def medals_per_year(count_by_year, color_map, title):
+    years, series = _long_to_columns(count_by_year, 'Year', 'Medal')
+    traces = [go.Bar(x=years, y=counts, name=medal, marker_color=color_map.get(medal), offsetgroup=medal,
+                     hovertemplate=f"Medal={medal}<br>Year=%{{x}}<br>Count=%{{y}}<extra></extra>")
+              for medal, counts in series]
+    return go.Figure(traces, layout=dict(BASE_LAYOUT, title=title, barmode='group', legend_title_text='Medal',
+                                         xaxis_title='Year', yaxis_title='Count'))
+
+
+def sport_medals(sport_counts, order, color_map, title):
+    sports = sport_counts['Sport'].astype(object).to_numpy()
+    medals = sport_counts['Medal'].astype(object).to_numpy()
+    counts = sport_counts['Count'].to_numpy()
+    medal_order = sport_counts['Medal'].cat.categories if isinstance(sport_counts['Medal'].dtype, pd.CategoricalDtype) \
+        else pd.unique(medals)
+    traces = []
+    for medal in medal_order:
+        rows = medals == medal
+        if rows.any():
+            traces.append(go.Bar(x=sports[rows], y=counts[rows], name=medal, marker_color=color_map.get(medal),
+                                 hovertemplate=f"Medal={medal}<br>Sport=%{{x}}<br>Count=%{{y}}<extra></extra>"))
+    return go.Figure(traces, layout=dict(BASE_LAYOUT, title=title, barmode='relative', legend_title_text='Medal',
+                                         xaxis=dict(title='Sport', categoryorder='array', categoryarray=order),
+                                         yaxis_title='Count'))
+
+
+def medal_leaders(leaderboard, title):
+    totals = leaderboard['Total Medals'].to_numpy()
+    trace = go.Bar(x=totals, y=leaderboard['Name'].astype(object).to_numpy(), orientation='h',
+                   marker=dict(color=totals, coloraxis='coloraxis'),
+                   hovertemplate="Total Medals=%{x}<br>Name=%{y}<extra></extra>")
+    return go.Figure([trace], layout=dict(
+        BASE_LAYOUT, title=title, xaxis_title='Total Medals', yaxis=dict(title='Name', categoryorder='total ascending'),
+        coloraxis=dict(colorscale='Viridis', colorbar_title_text='Total Medals')))
+
+
+def athlete_timeline(events, color_map, title, x_title, y_title, medal_size=12, other_size=4):
+    # one marker per event; medal markers are drawn last so they sit on top
+    rank = {'gold': 1, 'silver': 2, 'bronze': 3}
+    medals = events['Medal'].astype(object).to_numpy()
+    draw_order = np.argsort([-rank.get(m, 4) for m in medals], kind='stable')
+    events = events.iloc[draw_order]
+    medals = medals[draw_order]
+    sizes = np.where(np.isin(medals, list(rank)), medal_size, other_size).astype(float)
+    sizeref = 2.0 * sizes.max() / PX_MAX_MARKER_SIZE ** 2 if len(sizes) else 1.0
+
+    traces = []
+    for medal in pd.unique(medals):
+        rows = medals == medal
+        traces.append(go.Scatter(
+            x=events['Year'].to_numpy()[rows], y=events['Sport'].astype(object).to_numpy()[rows], mode='markers',
+            name=medal, hovertext=events['Event'].astype(object).to_numpy()[rows],
+            customdata=events['City'].astype(object).to_numpy()[rows].reshape(-1, 1),
+            hovertemplate=f"<b>%{{hovertext}}</b><br><br>Medal={medal}<br>Year=%{{x}}<br>City=%{{customdata[0]}}<extra></extra>",
+            marker=dict(color=color_map.get(medal), size=sizes[rows], sizemode='area', sizeref=sizeref,
+                        line=dict(width=1, color='DarkSlateGrey'))))
+    return go.Figure(traces, layout=dict(BASE_LAYOUT, title=title, legend_title_text='Medal', height=400,
+                                         xaxis=dict(dtick=4, title=x_title), yaxis=dict(title=y_title)))
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------
+# Bitmap index for the sidebar filters
+# -----------------------------------------------------------------------------
+# One packed bitset (uint64 words, bit i = row i) per Sport and per Medal value,
+# and one per Year holding every row up to and including that year, built once
+# per snapshot. A filter is then word-wide bit operations instead of full-length
+# comparisons: the year range is le[hi] & ~le[lo - 1], the sports and medals are
+# the OR of their bitsets, and the three are ANDed. An axis whose selection
+# covers every value adds no work, unless the column has missing values: those
+# rows match no value (as with isin), so it costs one AND with the column's
+# not-missing bitset. The result comes back as a boolean mask, as
+# row positions, or as a popcount when only the number of rows is needed.
+
+
+def pack(mask):
+    bits = np.packbits(mask, bitorder='little')
+    bits = np.concatenate([bits, np.zeros(-len(bits) % 8, dtype=np.uint8)])
+    return bits.view(np.uint64)
+
+
+def unpack(words, n):
+    return np.unpackbits(words.view(np.uint8), count=n, bitorder='little').view(bool)
+
+
+class FilterIndex:
+    def __init__(self, n, postings, years, year_le, present=None):
+        self.n = n
+        self.postings = postings      # column -> {value: bitset}
+        self.present = present or {}  # column -> rows with a value, only for columns with missing values
+        self.years = years            # distinct years, ascending
+        self.year_le = year_le        # year_le[i] = rows with Year <= years[i]
+
+    @classmethod
+    def from_frame(cls, df, columns=('Sport', 'Medal')):
+        postings, present = {}, {}
+        for col in columns:
+            codes, values = pd.factorize(df[col])
+            postings[col] = {value: pack(codes == code) for code, value in enumerate(values)}
+            if (codes < 0).any():
+                present[col] = pack(codes >= 0)
+
+        codes, years = pd.factorize(df['Year'], sort=True)
+        year_le = []
+        running = pack(np.zeros(len(df), dtype=bool))
+        for code in range(len(years)):
+            running = running | pack(codes == code)
+            year_le.append(running)
+        return cls(len(df), postings, np.asarray(years), year_le, present)
+
+    @property
+    def nbytes(self):
+        words = ([b for bitsets in self.postings.values() for b in bitsets.values()] + self.year_le
+                 + list(self.present.values()))
+        return sum(b.nbytes for b in words)
+
+    def _empty(self):
+        return np.zeros((self.n + 63) // 64, dtype=np.uint64)
+
+    def _years(self, year_range):
+        hi = np.searchsorted(self.years, year_range[1], side='right') - 1
+        lo = np.searchsorted(self.years, year_range[0], side='left') - 1
+        if hi <= lo:
+            return self._empty()
+        if hi == len(self.years) - 1 and lo < 0:
+            return None
+        return self.year_le[hi] if lo < 0 else self.year_le[hi] & ~self.year_le[lo]
+
+    def _any_of(self, col, values):
+        bitsets = self.postings[col]
+        wanted = set(values)
+        if wanted >= set(bitsets):
+            return self.present.get(col)
+        hits = [bitsets[v] for v in wanted if v in bitsets]
+        if not hits:
+            return self._empty()
+        return np.bitwise_or.reduce(hits) if len(hits) > 1 else hits[0]
+
+    def bits(self, year_range, sports, medals):
+        # packed rows matching all three axes
+        parts = [self._years(year_range), self._any_of('Sport', sports), self._any_of('Medal', medals)]
+        parts = [p for p in parts if p is not None]
+        if not parts:
+            return pack(np.ones(self.n, dtype=bool))
+        result = parts[0].copy()
+        for part in parts[1:]:
+            result &= part
+        return result
+
+    def mask(self, year_range, sports, medals):
+        return unpack(self.bits(year_range, sports, medals), self.n)
+
+    def positions(self, year_range, sports, medals):
+        return np.flatnonzero(self.mask(year_range, sports, medals))
+
+    def count(self, year_range, sports, medals):
+        return int(np.bitwise_count(self.bits(year_range, sports, medals)).sum())
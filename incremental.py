@@ -0,0 +1,341 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from chunked import read_options
+from cleaning import (CLEANING_VERSION, IMPUTE_LEVELS, apply_row_rules, fill_medians, fits, median_tables,
+                      update_median_counts)
+from parallel import finish_clean, row_stage
+from shared_store import SHARED_DIR, attach, publish_lock
+from snapshot import HASH_CHUNK, is_fresh, read_snapshot_meta, snapshot_path, write_snapshot
+
+# -----------------------------------------------------------------------------
+# Incremental append ingestion
+# -----------------------------------------------------------------------------
+# New Games results are appended to the end of dataset2.csv. Instead of
+# re-cleaning all of history, publish() keeps an ingest state next to the
+# snapshot and only cleans the bytes after the last consumed offset:
+#   - the exact per-(Sex, Sport, value) counts are updated, and old rows that
+#     were imputed are re-filled only where a (Sex, Sport), Sex or global
+#     median they depend on changed
+#   - duplicates are found with the persisted per-row hashes (keep first)
+#   - category dictionaries are unioned (old codes are remapped if needed)
+# Anything that is not a pure append (rewrite, truncation, new
+# CLEANING_VERSION, values that no longer fit the compact dtypes) falls back
+# to a full build. One known difference from a full build: a row dropped
+# earlier as an exact duplicate stays dropped even if a later median change
+# would make its re-imputed values distinct (use --full to rebuild).
+STATE_SUFFIX = ".ingest.pkl"
+
+
+def state_path(csv_path, store_dir=SHARED_DIR):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(store_dir, f"{stem}{STATE_SUFFIX}")
+
+
+def _load_state(path):
+    try:
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    return state if state.get('cleaning_version') == CLEANING_VERSION else None
+
+
+def _save_state(state, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _prefix_and_sha256(path, prefix_bytes, size):
+    # one read: sha256 of the first prefix_bytes (None if the file is
+    # shorter) and of the first size bytes, the part this build consumes
+    h, prefix, done = hashlib.sha256(), None, 0
+    with open(path, 'rb') as f:
+        reader = _LimitedReader(f, size)
+        for block in iter(lambda: reader.read(HASH_CHUNK), b''):
+            if prefix is None and done + len(block) >= prefix_bytes:
+                cut = prefix_bytes - done
+                h.update(block[:cut])
+                prefix = h.hexdigest()
+                h.update(block[cut:])
+            else:
+                h.update(block)
+            done += len(block)
+    if prefix is None and done == prefix_bytes:
+        prefix = h.hexdigest()
+    return prefix, h.hexdigest()
+
+
+class _LimitedReader:
+    # file-like view of the next `size` bytes, so a file being appended to
+    # while we parse it is only consumed up to the size we hashed
+    def __init__(self, f, size):
+        self.f = f
+        self.left = size
+
+    def read(self, n=-1):
+        if self.left <= 0:
+            return b''
+        n = self.left if n is None or n < 0 else min(n, self.left)
+        data = self.f.read(n)
+        self.left -= len(data)
+        return data
+
+    def __iter__(self):
+        # the python parser engine iterates lines
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def readline(self):
+        line = self.f.readline(self.left) if self.left > 0 else b''
+        self.left -= len(line)
+        return line
+
+
+def row_hashes(df):
+    # hashes of the stored (compact) rows; categoricals hash by value, so
+    # they stay valid when a category dictionary grows
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _nan_masks(rows, cols):
+    return {col: rows[col].isna().to_numpy() for col in cols}
+
+
+def _pack(masks):
+    return {col: (np.packbits(mask), len(mask)) for col, mask in masks.items()}
+
+
+def _unpack(packed):
+    return {col: np.unpackbits(bits, count=n).astype(bool) for col, (bits, n) in packed.items()}
+
+
+# ---- full build ---------------------------------------------------------------
+def full_build(csv_path, store_dir=SHARED_DIR, workers=None, stat=None):
+    stat = stat or os.stat(csv_path)
+    size = stat.st_size
+    _, sha256 = _prefix_and_sha256(csv_path, size, size)
+    with open(csv_path, 'rb') as f:
+        raw = pd.read_csv(_LimitedReader(f, size))
+    raw_rows = len(raw)
+    rows, counts = row_stage(raw, workers)
+    del raw
+    cols = list(counts)
+    was_nan = _nan_masks(rows, cols)
+    row_index = rows.index.copy()
+    df = finish_clean(rows, counts)
+    kept = row_index.get_indexer(df.index)
+
+    path = write_snapshot(df, csv_path, store_dir, sha256=sha256, stat=stat)
+    _save_state({
+        'cleaning_version': CLEANING_VERSION,
+        'consumed_bytes': size,
+        'sha256': sha256,
+        'raw_rows': raw_rows,
+        'counts': counts,
+        'hashes': row_hashes(df),
+        'was_nan': _pack({col: mask[kept] for col, mask in was_nan.items()}),
+    }, state_path(csv_path, store_dir))
+    return path, {'mode': 'full', 'rows': len(df)}
+
+
+# ---- append -------------------------------------------------------------------
+def _read_tail(csv_path, state, size):
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    with open(csv_path, 'rb') as f:
+        f.seek(state['consumed_bytes'])
+        tail = pd.read_csv(_LimitedReader(f, size - state['consumed_bytes']), header=None,
+                           names=columns, **read_options(csv_path))
+    tail.index = pd.RangeIndex(state['raw_rows'], state['raw_rows'] + len(tail))
+    return tail
+
+
+def _changed_keys(old_tables, old_global, new_tables, new_global):
+    # per imputation level, the keys whose median changed in any column
+    changed = []
+    for old, new in zip(old_tables, new_tables):
+        old = old.reindex(new.index)
+        differs = ~((old == new) | (old.isna() & new.isna())).all(axis=1)
+        changed.append(new.index[differs.to_numpy()])
+    global_changed = not np.array_equal(old_global, new_global, equal_nan=True)
+    return changed, global_changed
+
+
+def _refill_old(df, was_nan, cols, changed, global_changed, tables, global_medians):
+    # candidate rows: imputed in some column and depending on a changed median
+    imputed = np.zeros(len(df), dtype=bool)
+    for col in cols:
+        imputed |= was_nan[col]
+    if global_changed:
+        candidates = imputed
+    else:
+        depends = np.zeros(len(df), dtype=bool)
+        for keys, changed_keys in zip(IMPUTE_LEVELS, changed):
+            if len(changed_keys) == 0:
+                continue
+            if len(keys) > 1:
+                lookup = pd.MultiIndex.from_frame(df[keys].astype(object))
+            else:
+                lookup = pd.Index(df[keys[0]].astype(object))
+            depends |= lookup.isin(changed_keys)
+        candidates = imputed & depends
+    positions = np.flatnonzero(candidates)
+    if len(positions) == 0:
+        return df, positions
+
+    sub = df.iloc[positions][IMPUTE_LEVELS[0] + cols].astype({key: object for key in IMPUTE_LEVELS[0]})
+    sub[cols] = sub[cols].astype('float64')
+    for col in cols:
+        sub.loc[was_nan[col][positions], col] = np.nan
+    sub = fill_medians(sub, cols, tables, global_medians)
+
+    # columns are replaced, never written in place: df is a read-only mapping
+    patched = np.zeros(len(positions), dtype=bool)
+    for col in cols:
+        new_values = sub[col].to_numpy().astype(df[col].dtype)
+        old_values = df[col].to_numpy()[positions]
+        differs = ~((new_values == old_values) | (np.isnan(new_values) & np.isnan(old_values)))
+        if differs.any():
+            values = df[col].to_numpy().copy()
+            values[positions[differs]] = new_values[differs]
+            df[col] = values
+            patched |= differs
+    return df, positions[patched]
+
+
+def _align_tail(df, new_rows):
+    # cast the new rows to the stored dtypes; union category dictionaries
+    dtypes, recoded = {}, []
+    for col, dtype in df.dtypes.items():
+        if col not in new_rows.columns:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            values = pd.Index(new_rows[col].dropna().unique())
+            extra = values.difference(dtype.categories)
+            if len(extra):
+                dtype = pd.CategoricalDtype(dtype.categories.union(extra).sort_values())
+                recoded.append(col)
+        elif dtype.kind in 'iu' and not fits(new_rows[col], dtype):
+            return None, None
+        dtypes[col] = dtype
+    return dtypes, recoded
+
+
+def append(csv_path, store_dir, state, stat, sha256):
+    size = stat.st_size
+    df = attach(snapshot_path(csv_path, store_dir))
+    tail = _read_tail(csv_path, state, size)
+    new_rows = apply_row_rules(tail)
+    cols = list(state['counts'])
+    was_nan_old = _unpack(state['was_nan'])
+    was_nan_new = _nan_masks(new_rows, cols)
+
+    counts = {col: Counter(state['counts'][col]) for col in cols}
+    update_median_counts(counts, new_rows, cols)
+    old_tables, old_global = median_tables(state['counts'], cols)
+    tables, global_medians = median_tables(counts, cols)
+    changed, global_changed = _changed_keys(old_tables, old_global, tables, global_medians)
+
+    new_rows = fill_medians(new_rows, cols, tables, global_medians)
+    dtypes, recoded = _align_tail(df, new_rows)
+    if dtypes is None:
+        return None
+    if recoded:
+        df = df.astype({col: dtypes[col] for col in recoded})
+    new_rows = new_rows[list(df.columns)].astype(dtypes)
+
+    df, patched = _refill_old(df, was_nan_old, cols, changed, global_changed, tables, global_medians)
+    hashes = state['hashes'].copy()
+    if len(patched):
+        hashes[patched] = row_hashes(df.iloc[patched])
+    hashes = np.concatenate([hashes, row_hashes(new_rows)])
+
+    keep = ~pd.Series(hashes).duplicated().to_numpy()
+    n_old = len(df)
+    kept_old = keep[:n_old]
+    names = pd.Index(new_rows['Name'][keep[n_old:]].unique())
+    if len(patched):
+        names = names.union(df['Name'].iloc[patched].unique())
+    if not kept_old.all():
+        names = names.union(df['Name'][~kept_old].unique())
+    combined = pd.concat([df[kept_old], new_rows[keep[n_old:]]])
+    del df
+
+    path = write_snapshot(combined, csv_path, store_dir, sha256=sha256, stat=stat)
+    _save_state({
+        'cleaning_version': CLEANING_VERSION,
+        'consumed_bytes': size,
+        'sha256': sha256,
+        'raw_rows': state['raw_rows'] + len(tail),
+        'counts': counts,
+        'hashes': hashes[keep],
+        'was_nan': _pack({col: np.concatenate([was_nan_old[col], was_nan_new[col]])[keep] for col in cols}),
+    }, state_path(csv_path, store_dir))
+
+    first_new = int(kept_old.sum())
+    return path, {
+        'mode': 'append',
+        'rows': len(combined),
+        'rows_read': len(tail),
+        'rows_appended': len(combined) - first_new,
+        'new_rows': (first_new, len(combined)),
+        'patched_rows': len(patched),
+        'dropped_old': int((~kept_old).sum()),
+        'changed_groups': len(changed[0]),
+        'recoded': recoded,
+        'names': names,
+    }
+
+
+def publish(csv_path, store_dir=SHARED_DIR, full=False, workers=None):
+    # returns (snapshot path, delta); delta is None when nothing changed
+    path = snapshot_path(csv_path, store_dir)
+    if not full and os.path.exists(path) and is_fresh(read_snapshot_meta(path), csv_path):
+        return path, None
+    with publish_lock(store_dir):
+        if not full and os.path.exists(path) and is_fresh(read_snapshot_meta(path), csv_path):
+            return path, None
+        state = None if full or not os.path.exists(path) else _load_state(state_path(csv_path, store_dir))
+        # one stat before reading: the build consumes (and the snapshot is
+        # stamped with) exactly these bytes, so rows appended meanwhile are
+        # picked up by the next publish
+        stat = os.stat(csv_path)
+        if state is not None and stat.st_size > state['consumed_bytes']:
+            prefix, sha256 = _prefix_and_sha256(csv_path, state['consumed_bytes'], stat.st_size)
+            # a pure append: old bytes untouched and the old end was a line end
+            if prefix == state['sha256'] and _ends_with_newline(csv_path, state['consumed_bytes']):
+                result = append(csv_path, store_dir, state, stat, sha256)
+                if result is not None:
+                    return result
+        return full_build(csv_path, store_dir, workers, stat)
+
+
+def _ends_with_newline(path, offset):
+    with open(path, 'rb') as f:
+        f.seek(offset - 1)
+        return f.read(1) == b'\n'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Publish the cleaned dataset, cleaning only appended rows when possible.")
+    parser.add_argument('csv_path', nargs='?', default="dataset2.csv")
+    parser.add_argument('--store-dir', default=SHARED_DIR)
+    parser.add_argument('--full', action='store_true', help="ignore the ingest state and rebuild everything")
+    args = parser.parse_args()
+    path, delta = publish(args.csv_path, args.store_dir, full=args.full)
+    if delta is not None:
+        delta.pop('names', None)
+    print("Published:", path)
+    print(json.dumps(delta, indent=2, default=str))
@@ -0,0 +1,143 @@
+import contextlib
+import json
+import logging
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -----------------------------------------------------------------------------
+# Hot-path instrumentation for dashboard reruns
+# -----------------------------------------------------------------------------
+# Named spans (load, filter, overview, charts, leaderboard, profile...) are
+# timed per rerun. Every finished rerun is logged as one JSON line, kept in a
+# ring buffer for the debug panel, and folded into per-span histograms that
+# prometheus_text() renders in the Prometheus text exposition format.
+DEFAULT_HISTORY = 50
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = 'olympics'
+
+logger = logging.getLogger(__name__)
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+
+
+class Tracer:
+    def __init__(self, history=DEFAULT_HISTORY):
+        self.reruns = deque(maxlen=history)
+        self._histograms = {}
+        self._reruns_total = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    # ---- rerun lifecycle ----------------------------------------------------
+    def begin_rerun(self, session_id, page=None):
+        # st.rerun()/st.stop() end a script run by raising, so a rerun that was
+        # never closed on this thread is recorded as interrupted here
+        if getattr(self._local, 'rerun', None) is not None:
+            self.end_rerun(status='interrupted')
+        self._local.rerun = {
+            'session': session_id,
+            'page': page,
+            'started': time.time(),
+            'start': time.perf_counter(),
+            'spans': [],
+        }
+
+    def end_rerun(self, status='ok'):
+        rerun = getattr(self._local, 'rerun', None)
+        if rerun is None:
+            return None
+        self._local.rerun = None
+        total = time.perf_counter() - rerun.pop('start')
+        record = {**rerun, 'status': status, 'total_s': total}
+        with self._lock:
+            self.reruns.append(record)
+            self._observe('rerun', total)
+            self._reruns_total[status] = self._reruns_total.get(status, 0) + 1
+            for span in record['spans']:
+                self._observe(span['name'], span['seconds'])
+        logger.info(json.dumps({'event': 'rerun', **record}, default=str))
+        return record
+
+    @contextlib.contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            rerun = getattr(self._local, 'rerun', None)
+            seconds = time.perf_counter() - start
+            if rerun is not None:
+                rerun['spans'].append({'name': name, 'seconds': seconds})
+            else:
+                with self._lock:
+                    self._observe(name, seconds)
+
+    def _observe(self, name, seconds):
+        self._histograms.setdefault(name, _Histogram()).observe(seconds)
+
+    # ---- export ---------------------------------------------------------------
+    def recent(self, n=None):
+        # newest first, spans summed per name: [{'session', 'page', 'status', 'total_s', <span>: s}]
+        with self._lock:
+            reruns = list(self.reruns)[::-1][:n]
+        rows = []
+        for rerun in reruns:
+            row = {k: rerun[k] for k in ('started', 'session', 'page', 'status', 'total_s')}
+            for span in rerun['spans']:
+                row[span['name']] = row.get(span['name'], 0.0) + span['seconds']
+            rows.append(row)
+        return rows
+
+    def prometheus_text(self):
+        lines = [
+            f"# HELP {METRIC_PREFIX}_span_seconds Time spent in a named dashboard stage.",
+            f"# TYPE {METRIC_PREFIX}_span_seconds histogram",
+        ]
+        with self._lock:
+            for name, hist in sorted(self._histograms.items()):
+                for bound, count in zip(BUCKETS, hist.counts):
+                    lines.append(f'{METRIC_PREFIX}_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+                lines.append(f'{METRIC_PREFIX}_span_seconds_bucket{{span="{name}",le="+Inf"}} {hist.count}')
+                lines.append(f'{METRIC_PREFIX}_span_seconds_sum{{span="{name}"}} {hist.sum}')
+                lines.append(f'{METRIC_PREFIX}_span_seconds_count{{span="{name}"}} {hist.count}')
+            lines.append(f"# HELP {METRIC_PREFIX}_reruns_total Finished reruns by status.")
+            lines.append(f"# TYPE {METRIC_PREFIX}_reruns_total counter")
+            for status, count in sorted(self._reruns_total.items()):
+                lines.append(f'{METRIC_PREFIX}_reruns_total{{status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def start_metrics_server(tracer, port, host='127.0.0.1'):
+    # local-only /metrics endpoint for a Prometheus scrape
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_error(404)
+                return
+            body = tracer.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------
+# Leaderboard engine
+# -----------------------------------------------------------------------------
+# Gold/silver/bronze per athlete in one bincount over (name code, medal code),
+# then a partial selection (np.partition) for the top k instead of sorting
+# every athlete. Ties are broken deterministically by the ORDERS spec and
+# finally by name.
+MEDALS = ['gold', 'silver', 'bronze']
+DEFAULT_K = 20
+# column priority for ranking, all descending
+ORDERS = {
+    'total': ['Total', 'gold', 'silver', 'bronze'],
+    'olympic': ['gold', 'silver', 'bronze', 'Total'],
+}
+
+
+def medal_counts(df):
+    # one grouped pass: returns (names, int64 [athlete, gold/silver/bronze])
+    medal_idx = pd.Categorical(df['Medal'], categories=MEDALS).codes
+    medalled = medal_idx >= 0
+    # sort=True makes name codes alphabetical, so they double as the tie-break key
+    name_codes, names = pd.factorize(df['Name'][medalled], sort=True)
+    flat = name_codes.astype(np.int64) * len(MEDALS) + medal_idx[medalled]
+    counts = np.bincount(flat, minlength=len(names) * len(MEDALS)).reshape(len(names), len(MEDALS))
+    return np.asarray(names, dtype=object), counts
+
+
+def _rank_score(columns, order):
+    # pack the ranking columns into one int64 so a single partition works
+    keys = [columns[col] for col in ORDERS[order]]
+    base = int(max(int(k.max()) for k in keys)) + 1
+    if base ** len(keys) >= 2 ** 62:
+        return None
+    score = np.zeros(len(keys[0]), dtype=np.int64)
+    for key in keys:
+        score = score * base + key
+    return score
+
+
+def top_k(names, counts, k=DEFAULT_K, order='total'):
+    if order not in ORDERS:
+        raise ValueError(f"unknown leaderboard order {order!r}, expected one of {sorted(ORDERS)}")
+    columns = {medal: counts[:, i] for i, medal in enumerate(MEDALS)}
+    columns['Total'] = counts.sum(axis=1)
+
+    candidates = np.arange(len(names))
+    score = _rank_score(columns, order) if len(names) else None
+    if score is not None and k < len(names):
+        # everything tied with the k-th best stays a candidate, so the name
+        # tie-break below decides the boundary, not np.partition
+        kth = np.partition(-score, k - 1)[k - 1]
+        candidates = np.flatnonzero(-score <= kth)
+
+    # np.lexsort sorts by the last key first
+    sort_keys = [candidates] + [-columns[col][candidates] for col in reversed(ORDERS[order])]
+    ranked = candidates[np.lexsort(sort_keys)][:k]
+
+    table = pd.DataFrame({col: columns[col][ranked] for col in MEDALS + ['Total']},
+                         index=pd.Index(names[ranked], name='Name'))
+    return table
+
+
+def leaderboard_table(df, k=DEFAULT_K, order='total'):
+    names, counts = medal_counts(df)
+    return top_k(names, counts, k, order)
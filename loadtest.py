@@ -0,0 +1,318 @@
+import argparse
+import json
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import plotly.io as pio
+from streamlit.testing.v1 import AppTest
+
+from benchmark import RssSampler, current_rss, environment
+from engine import DATASET, MEDAL_OPTIONS, OlympicsEngine
+from figures import FigureCache, athlete_timeline, medal_leaders, medals_per_year, sport_medals
+from leaderboard import DEFAULT_K, ORDERS
+from pagination import DEFAULT_PAGE_SIZE, SORT_KEYS, page_of
+from refresher import warm
+
+# -----------------------------------------------------------------------------
+# Load test: many simulated dashboard users in one process
+# -----------------------------------------------------------------------------
+# Every simulated user replays a random interaction trace on its own thread,
+# the way Streamlit runs each session's reruns on a thread of one server
+# process: year slider moves, sport/medal multiselects, leaderboard size and
+# order, explorer paging, name search, a leaderboard row click into the
+# athlete profile, event log paging and the back button. Each step is one
+# rerun. Per user count the run reports the p50/p95/p99 rerun latency,
+# throughput (reruns/s) and peak RSS, to show where reruns start queueing.
+# Each user count runs in a fresh process with its own traces (seeded by
+# --seed and the level), so a level starts from empty query and figure caches
+# instead of replaying what the previous level already cached. The engine's
+# derived structures are warmed first, as the refresher does before a swap.
+#
+# Two drivers:
+#   engine   (default) repeats app.py's per-rerun calls against one
+#            OlympicsEngine + FigureCache per level (queries, figures, JSON payloads),
+#            without Streamlit's own overhead; fast enough for hundreds of users
+#   apptest  runs app.py itself through streamlit.testing AppTest, one AppTest
+#            per user; includes the script run and widget protocol. AppTest
+#            installs a process-global Runtime for each run, so runs are
+#            serialized: latency includes the wait for the other users' reruns
+#            and the figures are an upper bound, with AppTest's own per-run cost
+#
+#   python loadtest.py --users 1,10,50,100 --steps 40
+#   python loadtest.py --driver apptest --users 1,2,4,8 --steps 10 --out load.json
+DEFAULT_USERS = [1, 5, 10, 25, 50]
+DEFAULT_STEPS = 30
+SEED = 2016
+_APPTEST_LOCK = threading.Lock()
+COLOR_MAP = {'gold': '#FFD700', 'silver': '#C0C0C0', 'bronze': '#CD7F32', 'no medal': '#E0E0E0'}
+
+# next-action weights per page
+DASHBOARD_ACTIONS = {'years': 0.2, 'sports': 0.2, 'medals': 0.1, 'leaderboard': 0.1,
+                     'explorer': 0.1, 'search': 0.1, 'click': 0.2}
+PROFILE_ACTIONS = {'back': 0.7, 'event_log': 0.3}
+
+
+# ---- traces -----------------------------------------------------------------
+def make_trace(rng, steps, year_bounds, sports, names):
+    # [('open',), (action, *args), ...]; every entry is one rerun
+    trace, page = [('open',)], 'dashboard'
+    for _ in range(steps):
+        actions = DASHBOARD_ACTIONS if page == 'dashboard' else PROFILE_ACTIONS
+        action = rng.choice(list(actions), p=np.array(list(actions.values())) / sum(actions.values()))
+        if action == 'years':
+            lo, hi = sorted(int(y) for y in rng.integers(year_bounds[0], year_bounds[1] + 1, 2))
+            trace.append(('years', (lo, hi)))
+        elif action == 'sports':
+            picked = rng.choice(len(sports), int(rng.integers(1, min(len(sports), 10) + 1)), replace=False)
+            trace.append(('sports', [sports[i] for i in sorted(picked)]))
+        elif action == 'medals':
+            picked = rng.choice(len(MEDAL_OPTIONS), int(rng.integers(1, len(MEDAL_OPTIONS) + 1)), replace=False)
+            trace.append(('medals', [MEDAL_OPTIONS[i] for i in sorted(picked)]))
+        elif action == 'leaderboard':
+            trace.append(('leaderboard', int(rng.choice([10, 20, 50, 100])), str(rng.choice(list(ORDERS)))))
+        elif action == 'explorer':
+            trace.append(('explorer', int(rng.integers(1, 20)), str(rng.choice(SORT_KEYS))))
+        elif action == 'search':
+            name = names[int(rng.integers(len(names)))]
+            trace.append(('search', name[:int(rng.integers(3, 7))]))
+        elif action == 'click':
+            trace.append(('click', int(rng.integers(0, 10))))
+            page = 'athlete_profile'
+        elif action == 'event_log':
+            trace.append(('event_log', int(rng.integers(1, 3))))
+        else:
+            trace.append(('back',))
+            page = 'dashboard'
+    return trace
+
+
+# ---- drivers ----------------------------------------------------------------
+class EngineSession:
+    # one user's session state plus the calls app.py makes on a rerun
+    def __init__(self, engine, figure_cache):
+        self.engine = engine
+        self.figures = figure_cache
+        self.page = 'dashboard'
+        self.year_range = engine.year_bounds()
+        self.sports = engine.sports()[:5]
+        self.medals = list(MEDAL_OPTIONS)
+        self.top_k, self.order = DEFAULT_K, 'total'
+        self.explorer = (1, 'Year')
+        self.query = ''
+        self.athlete, self.event_page = None, 1
+        self.leaders = None
+
+    def step(self, action):
+        kind, args = action[0], action[1:]
+        if kind == 'years':
+            self.year_range = args[0]
+        elif kind == 'sports':
+            self.sports = args[0]
+        elif kind == 'medals':
+            self.medals = args[0]
+        elif kind == 'leaderboard':
+            self.top_k, self.order = args
+        elif kind == 'explorer':
+            self.explorer = args
+        elif kind == 'search':
+            self.query = args[0]
+        elif kind == 'click':
+            if self.leaders is not None and len(self.leaders):
+                self.page, self.event_page = 'athlete_profile', 1
+                self.athlete = self.leaders.index[min(args[0], len(self.leaders) - 1)]
+        elif kind == 'event_log':
+            self.event_page = args[0]
+        elif kind == 'back':
+            self.page, self.athlete = 'dashboard', None
+        self.rerun()
+
+    def _render(self, fig):
+        # st.plotly_chart serializes the figure on every rerun
+        return pio.to_json(fig, validate=False)
+
+    def rerun(self):
+        engine = self.engine
+        if self.page == 'athlete_profile':
+            profile = engine.athlete(self.athlete)
+            events = profile['events'][['Year', 'Sport', 'Medal', 'Event', 'City']]
+            self._render(self.figures.figure(athlete_timeline, events, color_map=COLOR_MAP, title="timeline",
+                                             x_title="Year", y_title="Sport"))
+            engine.athlete_events(self.athlete, self.event_page)
+            return
+
+        engine.year_bounds()
+        engine.sports()
+        if self.query:
+            engine.search(self.query)
+        selection = engine.filter(self.year_range, self.sports, self.medals)
+        overview = selection.overview()
+        self._render(self.figures.figure(medals_per_year, overview['count_by_year'], color_map=COLOR_MAP,
+                                         title="year"))
+        sport_counts = overview['sport_counts']
+        top_sports = overview['top_sports']
+        self._render(self.figures.figure(sport_medals, sport_counts[sport_counts['Sport'].isin(top_sports)],
+                                         order=top_sports, color_map=COLOR_MAP, title="sport"))
+        top = selection.leaderboard(self.top_k, self.order)
+        self.leaders = top
+        if not top.empty:
+            leaders = top['Total'].rename('Total Medals').reset_index()
+            self._render(self.figures.figure(medal_leaders, leaders, title="leaders"))
+            page_of(top, 1, DEFAULT_PAGE_SIZE)
+        page, sort_by = self.explorer
+        selection.page(page, DEFAULT_PAGE_SIZE, sort_by)
+
+
+class AppTestSession:
+    # one user = one AppTest running app.py; widgets are driven like a browser would
+    def __init__(self, script, timeout):
+        self.at = AppTest.from_file(script, default_timeout=timeout)
+
+    def _dashboard(self):
+        return self.at.session_state['current_page'] == 'dashboard'
+
+    def step(self, action):
+        with _APPTEST_LOCK:
+            self._step(action)
+
+    def _step(self, action):
+        at, kind, args = self.at, action[0], action[1:]
+        if kind in PROFILE_ACTIONS and self._dashboard():
+            # the click before found an empty leaderboard, so the user never left the dashboard
+            at.run()
+        elif kind == 'open':
+            at.run()
+        elif kind == 'years':
+            at.sidebar.slider[0].set_value(args[0]).run()
+        elif kind == 'sports':
+            at.sidebar.multiselect[0].set_value(args[0]).run()
+        elif kind == 'medals':
+            at.sidebar.multiselect[1].set_value(args[0]).run()
+        elif kind == 'leaderboard':
+            at.select_slider[0].set_value(args[0])
+            at.radio[0].set_value(args[1]).run()
+        elif kind == 'explorer':
+            at.selectbox(key='explorer_table_sort').set_value(args[1])
+            at.number_input(key='explorer_table_page').set_value(args[0]).run()
+        elif kind == 'search':
+            at.text_input[0].input(args[0]).run()
+        elif kind == 'click':
+            # a dataframe row selection cannot be injected; set what go_to_athlete() sets
+            table = at.dataframe[0].value
+            if len(table):
+                at.session_state['selected_athlete'] = table.index[min(args[0], len(table) - 1)]
+                at.session_state['current_page'] = 'athlete_profile'
+            at.run()
+        elif kind == 'event_log':
+            at.number_input(key='event_log_table_page').set_value(args[0]).run()
+        elif kind == 'back':
+            [b for b in at.button if b.label.startswith('🔙')][0].click().run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+
+# ---- run ----------------------------------------------------------------------
+def _user(session, trace, think, barrier, latencies, errors):
+    barrier.wait()
+    for action in trace:
+        start = time.perf_counter()
+        try:
+            session.step(action)
+        except Exception as exc:
+            errors.append(f"{action[0]}: {type(exc).__name__}: {exc}")
+            return
+        latencies.append(time.perf_counter() - start)
+        if think:
+            time.sleep(think)
+
+
+def run_level(users, make_session, traces, think=0.0):
+    latencies, errors = [], []
+    barrier = threading.Barrier(users + 1)
+    threads = [threading.Thread(target=_user, args=(make_session(), traces[i], think, barrier, latencies, errors),
+                                daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    sampler = RssSampler()
+    sampler.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    peak_rss = sampler.stop()
+
+    ms = np.array(latencies) * 1000
+    pct = np.percentile(ms, [50, 95, 99]) if len(ms) else [np.nan] * 3
+    return {
+        'users': users,
+        'reruns': len(latencies),
+        'errors': len(errors),
+        'error_samples': errors[:5],
+        'wall_s': wall,
+        'throughput_rps': len(latencies) / wall if wall else None,
+        'p50_ms': float(pct[0]), 'p95_ms': float(pct[1]), 'p99_ms': float(pct[2]),
+        'max_ms': float(ms.max()) if len(ms) else None,
+        'peak_rss_bytes': peak_rss,
+    }
+
+
+def measure_level(args, users, index):
+    # one user count, run in a fresh process by main()
+    engine = warm(OlympicsEngine.load(args.csv))
+    if args.driver == 'engine':
+        figure_cache = FigureCache()
+
+        def make_session():
+            return EngineSession(engine, figure_cache)
+    else:
+        def make_session():
+            return AppTestSession(args.script, args.timeout)
+
+    rng = np.random.default_rng([args.seed, index])
+    traces = [make_trace(rng, args.steps, engine.year_bounds(), engine.sports(), engine.athlete_index.names)
+              for _ in range(users)]
+    baseline_rss = current_rss()
+    level = run_level(users, make_session, traces, args.think)
+    level['baseline_rss_bytes'] = baseline_rss
+    return level
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard users and report rerun latency.")
+    parser.add_argument('--driver', choices=['engine', 'apptest'], default='engine')
+    parser.add_argument('--users', default=','.join(map(str, DEFAULT_USERS)), help="comma separated user counts")
+    parser.add_argument('--steps', type=int, default=DEFAULT_STEPS, help="interactions per user after the first load")
+    parser.add_argument('--think', type=float, default=0.0, help="seconds between a user's interactions (0 = closed loop)")
+    parser.add_argument('--csv', default=DATASET)
+    parser.add_argument('--script', default="app.py", help="Streamlit script for the apptest driver")
+    parser.add_argument('--timeout', type=float, default=120, help="per-run timeout for the apptest driver")
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--out', help="write JSON results here")
+    args = parser.parse_args(argv)
+
+    report = {'environment': environment(), 'driver': args.driver, 'steps': args.steps, 'think_s': args.think,
+              'levels': []}
+    print(f"{'users':>6} {'reruns':>7} {'err':>4} {'rerun/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS MB':>8}")
+    for index, users in enumerate(int(n) for n in args.users.split(',')):
+        # a fresh process per level: nothing cached by the previous level
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            level = pool.submit(measure_level, args, users, index).result()
+        report['levels'].append(level)
+        rss = level['peak_rss_bytes'] / 2 ** 20 if level['peak_rss_bytes'] else float('nan')
+        print(f"{users:>6} {level['reruns']:>7} {level['errors']:>4} {level['throughput_rps']:>8.1f} "
+              f"{level['p50_ms']:>8.1f} {level['p95_ms']:>8.1f} {level['p99_ms']:>8.1f} {rss:>8.0f}")
+        for error in level['error_samples']:
+            print("  error:", error, file=sys.stderr)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if any(level['errors'] for level in report['levels']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,14 @@
 import pandas as pd
 
+from cleaning import validate_names
+
 df = pd.read_csv("dataset2.csv")
 
 before = df.shape[0]
 
-invalid_names = df[~df['Name'].str.match(r'^[^\W\d_]+(?:[ \.\-][^\W\d_]+)*$', na=False)]
+# กฎตรวจชื่อเดียวกับที่ engine / cleaning.py ใช้กรองแถว (ตรวจแต่ละชื่อไม่ซ้ำแค่ครั้งเดียว)
+valid, rejected = validate_names(df['Name'], report=True)
 
-print("Invalid rows:", invalid_names.shape[0])
-print(invalid_names['Name'].head())
+print("Invalid rows:", before - int(valid.sum()))
+print("Invalid names:", len(rejected))
+print(rejected.head().to_string(index=False))
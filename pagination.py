@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------
+# Server-side sorting and paging
+# -----------------------------------------------------------------------------
+# Large tables are sorted and sliced here and only the visible window is sent
+# to the browser. For the common sort keys the engine keeps a SortIndex: the
+# stable order of every row by that column (computed once) and its inverse,
+# the rank of each row. Ordering a filtered selection is then a single pass
+# over the precomputed order (sort_mask), and ordering a small set of rows,
+# such as one athlete's events, is an argsort of their ranks (sort_positions);
+# neither re-sorts the column. Strings sort alphabetically, missing values last.
+SORT_KEYS = ['Year', 'Name', 'Sport']
+PAGE_SIZES = [25, 50, 100]
+DEFAULT_PAGE_SIZE = PAGE_SIZES[0]
+
+
+def _sort_keys(values):
+    # dense integer key per row that orders like the values
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # category order is not guaranteed to be alphabetical (e.g. after an append)
+        ranks, _ = pd.factorize(values.cat.categories, sort=True)
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes < 0, len(ranks), ranks[codes])
+    keys, uniques = pd.factorize(values, sort=True)
+    return np.where(keys < 0, len(uniques), keys)
+
+
+class SortIndex:
+    def __init__(self, order):
+        self.order = order                          # row positions, ascending by the column
+        self.rank = np.empty_like(order)            # rank[row] = place of the row in order
+        self.rank[order] = np.arange(len(order), dtype=order.dtype)
+
+    @classmethod
+    def from_column(cls, values):
+        return cls(np.argsort(_sort_keys(values), kind='stable').astype(np.int64))
+
+    def sort_mask(self, mask, ascending=True):
+        # positions of the rows where mask is True, in sort order: O(n), no sort
+        positions = self.order[mask[self.order]]
+        return positions if ascending else positions[::-1]
+
+    def sort_positions(self, positions, ascending=True):
+        # a small subset of rows, ordered by their precomputed ranks
+        positions = positions[np.argsort(self.rank[positions], kind='stable')]
+        return positions if ascending else positions[::-1]
+
+
+def page_bounds(total, page=1, page_size=DEFAULT_PAGE_SIZE):
+    # clamps the 1-based page number, returns (page, pages, start, stop)
+    pages = max(1, math.ceil(total / page_size))
+    page = min(max(1, int(page)), pages)
+    start = (page - 1) * page_size
+    return page, pages, start, min(start + page_size, total)
+
+
+def page_of(frame, page=1, page_size=DEFAULT_PAGE_SIZE):
+    # one window of an already ordered frame (e.g. a ranked leaderboard)
+    page, pages, start, stop = page_bounds(len(frame), page, page_size)
+    return {'rows': frame.iloc[start:stop], 'total': len(frame), 'page': page, 'pages': pages, 'start': start}
+
+
+def page_rows(df, positions, page=1, page_size=DEFAULT_PAGE_SIZE, columns=None):
+    # one window of df given the ordered row positions of the whole result
+    page, pages, start, stop = page_bounds(len(positions), page, page_size)
+    rows = df.iloc[positions[start:stop]]
+    if columns is not None:
+        rows = rows[columns]
+    return {'rows': rows, 'total': len(positions), 'page': page, 'pages': pages, 'start': start}
@@ -0,0 +1,98 @@
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cleaning import (IMPUTE_COLS, apply_row_rules, category_columns, clean_data, compact_frame, fill_medians,
+                      median_tables, new_median_counts, update_median_counts)
+
+# -----------------------------------------------------------------------------
+# Multi-core cleaning
+# -----------------------------------------------------------------------------
+# Same result as cleaning.clean_data(), with the per-row work spread over a
+# process pool. The frame is split into contiguous row ranges. Each worker
+# runs the row rules (name regex, Medal normalization, range clipping) and
+# counts the values per (Sex, Sport, value) for the median imputation. The
+# parent merges the counts into exact medians (see cleaning.median_tables),
+# then fills, casts, de-duplicates and compacts the concatenated parts.
+#
+# OLYMPICS_WORKERS selects the mode: unset/1 = serial, N = N processes,
+# "auto" = one per CPU. Inputs under PARALLEL_MIN_ROWS always run serially,
+# where process start-up and pickling cost more than they save.
+PARALLEL_MIN_ROWS = 200_000
+PARTS_PER_WORKER = 2
+
+
+def configured_workers(value=None):
+    value = value if value is not None else os.environ.get('OLYMPICS_WORKERS', '1')
+    if str(value).strip().lower() == 'auto':
+        return os.cpu_count() or 1
+    return max(1, int(value))
+
+
+def _row_stage(part):
+    # runs in a worker process
+    part = apply_row_rules(part)
+    cols = [col for col in IMPUTE_COLS if col in part.columns]
+    counts = new_median_counts(cols)
+    update_median_counts(counts, part, cols)
+    return part, counts
+
+
+def row_stage(df, workers=None, min_rows=PARALLEL_MIN_ROWS):
+    # row rules + per-(Sex, Sport, value) counts, returns (rows, counts)
+    workers = configured_workers(workers)
+    if workers <= 1 or len(df) < min_rows:
+        return _row_stage(df)
+
+    # split by position; the row index travels with each part, so the
+    # concatenated result keeps clean_data()'s index and row order
+    bounds = np.linspace(0, len(df), workers * PARTS_PER_WORKER + 1).astype(int)
+    parts = [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    # spawn: Streamlit runs scripts on threads, and forking a threaded process is unsafe
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        results = list(pool.map(_row_stage, parts))
+
+    rows = pd.concat([part for part, _ in results])
+    counts = new_median_counts(results[0][1])
+    for _, part_counts in results:
+        for col in counts:
+            counts[col].update(part_counts[col])
+    return rows, counts
+
+
+def finish_clean(rows, counts):
+    # everything after the row stage, as in clean_data(): impute from the
+    # merged counts, cast categories, drop duplicates, compact
+    cols = list(counts)
+    if cols:
+        tables, global_medians = median_tables(counts, cols)
+        rows = fill_medians(rows, cols, tables, global_medians)
+    existing_cat_cols = category_columns(rows)
+    rows[existing_cat_cols] = rows[existing_cat_cols].astype('category')
+    rows.drop_duplicates(inplace=True)
+    return compact_frame(rows)
+
+
+def clean_data_parallel(df, workers=None, min_rows=PARALLEL_MIN_ROWS):
+    if configured_workers(workers) <= 1 or len(df) < min_rows:
+        return clean_data(df)
+    rows, counts = row_stage(df, workers, min_rows)
+    del df
+    return finish_clean(rows, counts)
+
+
+def load_and_clean_csv(path, workers=None):
+    return clean_data_parallel(pd.read_csv(path), workers)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Clean the Olympic CSV on several cores.")
+    parser.add_argument('csv_path', nargs='?', default="dataset2.csv")
+    parser.add_argument('--workers', default=None, help="process count or 'auto' (default: OLYMPICS_WORKERS or 1)")
+    args = parser.parse_args()
+    df = load_and_clean_csv(args.csv_path, args.workers)
+    print("Rows:", df.shape[0])
@@ -0,0 +1,101 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------
+# Memoized dashboard queries
+# -----------------------------------------------------------------------------
+# A process-wide LRU cache that sits between the sidebar filters and the
+# overview/leaderboard computations. Entries are keyed on the normalized filter
+# tuple, so toggling back to a filter state any session has already viewed is a
+# dict lookup. Eviction is by an approximate memory budget, not entry count.
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def filter_key(year_range, sports, medals):
+    return (int(year_range[0]), int(year_range[1]), tuple(sorted(sports)), tuple(sorted(medals)))
+
+
+def estimate_size(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True, index=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, sizeof=estimate_size):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._inflight = {}            # key -> Event, so concurrent misses compute once
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+                pending = self._inflight.get(key)
+                if pending is None:
+                    self.misses += 1
+                    pending = self._inflight[key] = threading.Event()
+                    break
+            # another session is computing the same key: wait, then re-check
+            pending.wait()
+
+        try:
+            value = compute()
+            self._put(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set()
+
+    def _put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,165 @@
+import logging
+import os
+import threading
+import time
+
+from engine import DATASET, OlympicsEngine
+from pagination import SORT_KEYS
+from shared_store import SHARED_DIR
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # no watchdog: poll the file's mtime/size instead
+    Observer = None
+    FileSystemEventHandler = object
+
+# -----------------------------------------------------------------------------
+# Background dataset refresh (stale-while-revalidate)
+# -----------------------------------------------------------------------------
+# A watchdog observer watches the source CSV. A change wakes a worker thread,
+# which waits until the file has been quiet for DEBOUNCE_SECONDS and then
+# re-ingests it off the request path (OlympicsEngine.refreshed(): incremental
+# for appends, full rebuild otherwise). It warms the derived structures and
+# only then swaps the new engine in. Readers call current() once per rerun and
+# keep using the previous engine until the swap; a failed refresh is logged and
+# the previous engine stays live.
+DEBOUNCE_SECONDS = 2.0
+POLL_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+def warm(engine):
+    # build everything a first page view needs before the engine goes live
+    engine.year_bounds()
+    engine.sports()
+    engine.cube
+    engine.summary
+    engine.athlete_index
+    engine.filter_index
+    for column in SORT_KEYS:
+        engine.sort_index(column)
+    return engine
+
+
+class _SourceHandler(FileSystemEventHandler):
+    def __init__(self, path, changed):
+        self.path = os.path.abspath(path)
+        self.changed = changed
+
+    def on_any_event(self, event):
+        paths = [getattr(event, 'src_path', None), getattr(event, 'dest_path', None)]
+        if self.path in [os.path.abspath(p) for p in paths if p]:
+            self.changed()
+
+
+class DatasetRefresher:
+    def __init__(self, engine, csv_path=DATASET, store_dir=SHARED_DIR, debounce=DEBOUNCE_SECONDS):
+        self.csv_path = csv_path
+        self.store_dir = store_dir
+        self.debounce = debounce
+        self._engine = engine
+        self.loaded_at = time.time()
+        self.refreshing = False
+        self.last_error = None
+        self.refreshes = 0
+        self._last_event = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._observer = None
+        self._worker = None
+
+    @classmethod
+    def start(cls, csv_path=DATASET, store_dir=SHARED_DIR, debounce=DEBOUNCE_SECONDS, **engine_kwargs):
+        # first load is synchronous; every later one happens in the background
+        refresher = cls(warm(OlympicsEngine.load(csv_path, store_dir, **engine_kwargs)), csv_path, store_dir, debounce)
+        refresher.watch()
+        return refresher
+
+    def current(self):
+        # attribute reads are atomic: a rerun sees either the old or the new engine
+        return self._engine
+
+    # ---- watching -------------------------------------------------------------
+    def watch(self):
+        self._worker = threading.Thread(target=self._run, name="dataset-refresher", daemon=True)
+        self._worker.start()
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_SourceHandler(self.csv_path, self.notify),
+                                    os.path.dirname(os.path.abspath(self.csv_path)), recursive=False)
+            self._observer.daemon = True
+            self._observer.start()
+        else:
+            threading.Thread(target=self._poll, name="dataset-poller", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+
+    def notify(self):
+        self._last_event = time.monotonic()
+        self._wake.set()
+
+    def _poll(self):
+        last = None
+        while not self._stop.wait(POLL_SECONDS):
+            try:
+                st = os.stat(self.csv_path)
+            except OSError:
+                continue
+            current = (st.st_mtime_ns, st.st_size)
+            if last is not None and current != last:
+                self.notify()
+            last = current
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            if self._stop.is_set():
+                return
+            # let a writer finish: wait until no event arrived for `debounce` seconds
+            # (one clock read per check: sleep() raises on a negative time)
+            while True:
+                remaining = max(0.0, self.debounce - (time.monotonic() - self._last_event))
+                if not remaining:
+                    break
+                time.sleep(remaining)
+            self._wake.clear()
+            self.refresh()
+
+    # ---- refresh --------------------------------------------------------------
+    def refresh(self):
+        self.refreshing = True
+        started = time.perf_counter()
+        try:
+            engine = self._engine.refreshed(self.csv_path, self.store_dir)
+            if engine is not self._engine:
+                self._engine = warm(engine)
+                self.loaded_at = time.time()
+                self.refreshes += 1
+                logger.info("dataset refreshed to %s in %.2fs", (engine.version or '')[:12],
+                            time.perf_counter() - started)
+            self.last_error = None
+        except Exception as exc:
+            # keep serving the previous snapshot; the next change retries
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            logger.exception("dataset refresh failed")
+        finally:
+            self.refreshing = False
+        return self._engine
+
+    def status(self):
+        engine = self._engine
+        return {
+            'version': (engine.version or '')[:12],
+            'rows': len(engine.df),
+            'loaded_at': self.loaded_at,
+            'age_s': time.time() - self.loaded_at,
+            'refreshing': self.refreshing,
+            'refreshes': self.refreshes,
+            'last_error': self.last_error,
+        }
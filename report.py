@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from engine import DATASET, MEDAL_OPTIONS, OlympicsEngine
+from leaderboard import DEFAULT_K, MEDALS, ORDERS, top_k
+from shared_store import SHARED_DIR
+
+# -----------------------------------------------------------------------------
+# Headless batch reports
+# -----------------------------------------------------------------------------
+# The dashboard's overview metrics, per-year / per-sport medal counts and
+# leaderboard for many filter specs at once, without Streamlit. The dataset is
+# loaded once. The counts come from the medal cube and the row masks from the
+# bitmap filter index. Every leaderboard reuses one name factorization of the
+# medal rows (LeaderboardBatch), so a spec costs one bincount instead of a
+# filtered frame plus a groupby. The athletes column is an exact distinct count
+# over the same mask (one bincount of the name codes, not the cube's HLL
+# estimate). Each table is written with one row set per spec:
+#
+#   python report.py specs.json --out reports --format parquet,csv,json
+#
+# A spec file is a JSON list (or JSON Lines) of objects; every key is optional:
+#
+#   {"name": "swimming-modern", "years": [1990, 2016], "sports": ["Swimming"],
+#    "medals": ["gold"], "k": 20, "order": "olympic"}
+#
+# years is [from, to] or a single year; a missing axis means "everything". As in
+# the dashboard, an empty sports list also means every sport. Specs that could
+# only give an all-zero report are rejected: an empty medals list, years that
+# are not integers, run backwards or miss the data's year range.
+REPORT_DIR = "reports"
+FORMATS = ['parquet', 'csv', 'json']
+SPEC_KEYS = {'name', 'years', 'sports', 'medals', 'k', 'order'}
+
+
+class LeaderboardBatch:
+    # name codes and medal codes of the medal rows, factorized once for all specs
+    def __init__(self, df):
+        medal_idx = pd.Categorical(df['Medal'], categories=MEDALS).codes
+        self.rows = np.flatnonzero(medal_idx >= 0)
+        # sort=True keeps name codes alphabetical, the tie-break top_k relies on
+        codes, names = pd.factorize(df['Name'].iloc[self.rows], sort=True)
+        self.names = np.asarray(names, dtype=object)
+        self.flat = codes.astype(np.int64) * len(MEDALS) + medal_idx[self.rows]
+
+    def table(self, mask, k=DEFAULT_K, order='total'):
+        # same result as leaderboard_table(df[mask], k, order)
+        flat = self.flat[mask[self.rows]]
+        counts = np.bincount(flat, minlength=len(self.names) * len(MEDALS)).reshape(len(self.names), len(MEDALS))
+        present = counts.any(axis=1)
+        return top_k(self.names[present], counts[present], k, order)
+
+
+def load_specs(path):
+    text = sys.stdin.read() if path == '-' else open(path, encoding='utf-8').read()
+    if text.lstrip().startswith('['):
+        specs = json.loads(text)
+    else:
+        specs = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if not all(isinstance(spec, dict) for spec in specs):
+        raise ValueError("every spec must be a JSON object")
+    return specs
+
+
+def resolve_spec(engine, spec, number):
+    # validated {'name', 'selection', 'k', 'order'}; raises ValueError on a bad spec
+    name = str(spec.get('name', f"spec-{number}"))
+    unknown = set(spec) - SPEC_KEYS
+    if unknown:
+        raise ValueError(f"{name}: unknown keys {sorted(unknown)}, expected {sorted(SPEC_KEYS)}")
+
+    years = spec.get('years')
+    if isinstance(years, int) and not isinstance(years, bool):
+        years = (years, years)
+    if years is not None:
+        if (not isinstance(years, (list, tuple)) or len(years) != 2
+                or not all(isinstance(y, int) and not isinstance(y, bool) for y in years)):
+            raise ValueError(f"{name}: years must be [from, to] or a single year, as integers")
+        first, last = engine.year_bounds()
+        if years[0] > years[1]:
+            raise ValueError(f"{name}: years {list(years)} run backwards")
+        if years[1] < first or years[0] > last:
+            raise ValueError(f"{name}: years {list(years)} are outside the data ({first}-{last})")
+
+    sports, medals = spec.get('sports') or None, spec.get('medals')
+    if medals is not None and not medals:
+        raise ValueError(f"{name}: medals must not be empty")
+    for label, values, known in [('sports', sports, engine.sports()), ('medals', medals, MEDAL_OPTIONS)]:
+        missing = sorted(set(values or []) - set(known))
+        if missing:
+            raise ValueError(f"{name}: unknown {label} {missing}")
+
+    order = spec.get('order', 'total')
+    if order not in ORDERS:
+        raise ValueError(f"{name}: unknown order {order!r}, expected one of {sorted(ORDERS)}")
+    k = int(spec.get('k', DEFAULT_K))
+    if k < 1:
+        raise ValueError(f"{name}: k must be at least 1")
+    return {'name': name, 'selection': engine.filter(years, sports, medals), 'k': k, 'order': order}
+
+
+def _label(values, everything):
+    return 'all' if set(values) >= set(everything) else ', '.join(values)
+
+
+def build_report(engine, specs):
+    # {'overview', 'by_year', 'by_sport', 'leaderboard'} frames, keyed by a 'spec' column
+    batch = LeaderboardBatch(engine.df)
+    name_codes, names = pd.factorize(engine.df['Name'])
+    overview, by_year, by_sport, leaders = [], [], [], []
+    for spec in specs:
+        selection = spec['selection']
+        mask = selection.mask()
+        stats = selection.overview()
+        athletes = name_codes[mask]
+        athletes = np.count_nonzero(np.bincount(athletes[athletes >= 0], minlength=len(names)))
+        totals = stats['medal_totals']
+        overview.append({
+            'spec': spec['name'],
+            'year_from': selection.year_range[0],
+            'year_to': selection.year_range[1],
+            'sports': _label(selection.sports, engine.sports()),
+            'medals': _label(selection.medals, MEDAL_OPTIONS),
+            'rows': selection.count(),
+            **{medal: int(totals.get(medal, 0)) for medal in MEDAL_OPTIONS},
+            'athletes': int(athletes),
+        })
+        by_year.append(stats['count_by_year'].assign(spec=spec['name']))
+        sport_counts = stats['sport_counts']
+        by_sport.append(sport_counts[sport_counts['Count'] > 0].assign(spec=spec['name']))
+
+        table = batch.table(mask, spec['k'], spec['order']).reset_index()
+        table.insert(0, 'Rank', np.arange(1, len(table) + 1))
+        leaders.append(table.assign(spec=spec['name']))
+
+    def stack(frames):
+        out = pd.concat(frames, ignore_index=True)
+        for col in out.select_dtypes('category'):
+            out[col] = out[col].astype(str)
+        return out[['spec'] + [c for c in out.columns if c != 'spec']]
+
+    return {
+        'overview': pd.DataFrame(overview),
+        'by_year': stack(by_year),
+        'by_sport': stack(by_sport),
+        'leaderboard': stack(leaders),
+    }
+
+
+def write_report(tables, out_dir=REPORT_DIR, formats=FORMATS):
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for name, table in tables.items():
+        for fmt in formats:
+            path = os.path.join(out_dir, f"{name}.{fmt}")
+            if fmt == 'parquet':
+                table.to_parquet(path, index=False)
+            elif fmt == 'csv':
+                table.to_csv(path, index=False)
+            elif fmt == 'json':
+                table.to_json(path, orient='records', indent=2, force_ascii=False)
+            else:
+                raise ValueError(f"unknown format {fmt!r}, expected one of {FORMATS}")
+            written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write overview / leaderboard reports for many filter specs at once.")
+    parser.add_argument('specs', help="JSON list or JSON Lines file of filter specs ('-' for stdin)")
+    parser.add_argument('--csv', default=DATASET, help="source dataset (default: %(default)s)")
+    parser.add_argument('--store-dir', default=SHARED_DIR)
+    parser.add_argument('--out', default=REPORT_DIR, help="output directory (default: %(default)s)")
+    parser.add_argument('--format', default='parquet', help=f"comma separated, any of {','.join(FORMATS)}")
+    args = parser.parse_args(argv)
+
+    formats = [fmt.strip() for fmt in args.format.split(',') if fmt.strip()]
+    unknown = sorted(set(formats) - set(FORMATS))
+    if unknown:
+        parser.error(f"unknown format(s) {unknown}, expected any of {FORMATS}")
+
+    engine = OlympicsEngine.load(args.csv, args.store_dir)
+    try:
+        specs = [resolve_spec(engine, spec, i) for i, spec in enumerate(load_specs(args.specs), 1)]
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+
+    for path in write_report(build_report(engine, specs), args.out, formats):
+        print("Wrote:", path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
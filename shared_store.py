@@ -0,0 +1,52 @@
+import contextlib
+import os
+
+import pyarrow.feather as feather
+
+from snapshot import SNAPSHOT_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, os.replace still keeps it safe
+    fcntl = None
+
+# -----------------------------------------------------------------------------
+# Zero-copy dataset shared by every Streamlit process on a host
+# -----------------------------------------------------------------------------
+# One process publishes the cleaned frame (incremental.publish, which also
+# keeps the ingest state for appends) as an uncompressed Arrow IPC file
+# (the snapshot format, one record batch); every app process memory-maps it
+# read-only. With the compact dtypes (every string column is a categorical)
+# all numeric columns and category codes are views on the mapping, so those
+# live once in the page cache however many workers attach. What each process
+# still materializes is the category dictionaries as Python strings: small for
+# every column except Name, one str per distinct athlete (~13 MB at 270k rows).
+# Anything the engine derives from the frame (athlete index, summary, ...) is
+# per process as well.
+# Point OLYMPICS_SHARED_DIR at /dev/shm to keep the file in shared memory.
+# The publishing process cleans on OLYMPICS_WORKERS cores (see parallel.py).
+SHARED_DIR = os.environ.get('OLYMPICS_SHARED_DIR', SNAPSHOT_DIR)
+
+
+@contextlib.contextmanager
+def publish_lock(store_dir):
+    os.makedirs(store_dir, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(store_dir, '.publish.lock'), 'w') as lock:
+        # the first worker builds, the rest block here and then just attach
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def attach(path):
+    # split_blocks keeps every column as its own block, so pandas wraps the
+    # mapped Arrow buffers instead of consolidating (copying) them; the
+    # resulting arrays are read-only
+    table = feather.read_table(path, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
@@ -0,0 +1,81 @@
+import hashlib
+import os
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from cleaning import CLEANING_VERSION
+
+# -----------------------------------------------------------------------------
+# Columnar snapshot of the cleaned dataset
+# -----------------------------------------------------------------------------
+# The cleaned frame is persisted as an uncompressed Arrow IPC (Feather v2) file
+# so a cold start is a memory-mapped read instead of a CSV parse + full clean.
+# Categoricals are stored as dictionary-encoded columns and come back as
+# pandas categories. The snapshot is keyed on the source file (mtime/size as a
+# fast path, sha256 of the content as the real key) and on CLEANING_VERSION.
+SNAPSHOT_DIR = ".snapshots"
+HASH_CHUNK = 1 << 20
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def snapshot_path(csv_path, snapshot_dir=SNAPSHOT_DIR):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(snapshot_dir, f"{stem}.clean.arrow")
+
+
+def read_snapshot_meta(path):
+    try:
+        with pa.memory_map(path, 'r') as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    return {k.decode(): v.decode() for k, v in metadata.items() if k.startswith(b'snapshot.')}
+
+
+def _source_meta(csv_path, sha256=None, stat=None):
+    # stat / sha256: what the build actually read, taken before reading, so
+    # bytes appended while it ran leave the snapshot stale instead of fresh
+    st = stat or os.stat(csv_path)
+    return {
+        'snapshot.source_mtime_ns': str(st.st_mtime_ns),
+        'snapshot.source_size': str(st.st_size),
+        'snapshot.source_sha256': sha256 or file_sha256(csv_path),
+        'snapshot.cleaning_version': str(CLEANING_VERSION),
+    }
+
+
+def is_fresh(meta, csv_path):
+    if not meta or meta.get('snapshot.cleaning_version') != str(CLEANING_VERSION):
+        return False
+    st = os.stat(csv_path)
+    if (meta.get('snapshot.source_mtime_ns') == str(st.st_mtime_ns)
+            and meta.get('snapshot.source_size') == str(st.st_size)):
+        return True
+    # mtime/size moved (touch, copy, checkout): only the content hash decides
+    return meta.get('snapshot.source_sha256') == file_sha256(csv_path)
+
+
+def write_snapshot(df, csv_path, snapshot_dir=SNAPSHOT_DIR, sha256=None, stat=None):
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = snapshot_path(csv_path, snapshot_dir)
+    table = pa.Table.from_pandas(df)
+    metadata = dict(table.schema.metadata or {})
+    metadata.update({k.encode(): v.encode() for k, v in _source_meta(csv_path, sha256, stat).items()})
+    table = table.replace_schema_metadata(metadata)
+
+    # write next to the target and swap, so readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    # one record batch: readers can then map every column without stitching
+    # chunks together (see shared_store.attach)
+    feather.write_feather(table, tmp_path, compression='uncompressed', chunksize=max(table.num_rows, 1))
+    os.replace(tmp_path, path)
+    return path
+
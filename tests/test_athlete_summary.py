@@ -0,0 +1,50 @@
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from athlete_summary import build_athlete_summary, global_leaderboard, update_athlete_summary
+from leaderboard import leaderboard_table
+
+
+def frame(rows):
+    df = pd.DataFrame(rows, columns=['Name', 'Sex', 'Age', 'Height', 'Weight', 'Team', 'region', 'Year', 'Medal'])
+    for col in ['Name', 'Sex', 'Team', 'region', 'Medal']:
+        df[col] = df[col].astype(pd.CategoricalDtype(sorted(df[col].dropna().unique())))
+    return df
+
+
+OLD = [
+    ['Anna', 'F', 22.0, 170.0, 60.0, 'Norway', 'Norway', 2008, 'gold'],
+    ['Ben', 'M', 25.0, 180.0, 80.0, 'Kenya', 'Kenya', 2008, 'no medal'],
+    ['Carl', 'M', 30.0, 185.0, 90.0, 'Chile', 'Chile', 2012, 'bronze'],
+]
+NEW = [
+    ['Anna', 'F', 26.0, 170.0, 61.0, 'Norway', 'Norway', 2012, 'silver'],
+    ['Abe', 'M', 19.0, 175.0, 70.0, 'Fiji', 'Fiji', 2016, 'gold'],
+]
+
+
+def test_update_keeps_the_full_build_dtypes():
+    # the appended rows bring new Name / Team / region categories, so the old
+    # and patched rows carry different dictionaries
+    summary = build_athlete_summary(frame(OLD))
+    df = frame(OLD + NEW)
+    updated = update_athlete_summary(summary, df, ['Anna', 'Abe'])
+    assert_frame_equal(updated, build_athlete_summary(df), check_exact=True)
+    assert isinstance(updated.index, pd.CategoricalIndex)
+
+
+def test_update_removes_athletes_without_rows():
+    df = frame(OLD)
+    rest = df[df['Name'] != 'Ben']
+    updated = update_athlete_summary(build_athlete_summary(df), rest, ['Ben'])
+    assert_frame_equal(updated, build_athlete_summary(rest), check_exact=True)
+
+
+def test_global_leaderboard_ranks_only_medallists():
+    # k above the number of medallists: athletes without a medal stay out
+    df = frame(OLD + NEW)
+    for order in ['total', 'olympic']:
+        expected = leaderboard_table(df, k=100, order=order)
+        result = global_leaderboard(build_athlete_summary(df), k=100, order=order)
+        assert_frame_equal(result, expected, check_index_type=False)
+        assert 'Ben' not in result.index
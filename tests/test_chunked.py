@@ -0,0 +1,39 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+from pandas.testing import assert_frame_equal
+
+from benchmark import generate_dataset
+from chunked import clean_csv_chunked, clean_csv_to_arrow
+from cleaning import load_and_clean_csv
+
+
+def write_csv(path, rows, seed, case):
+    df = generate_dataset(rows, seed=seed)
+    # exact duplicates, across chunk boundaries too
+    df = df.iloc[np.r_[np.arange(rows), np.arange(0, rows, 7)]].reset_index(drop=True)
+    if case == 'nan_year':
+        # one chunk has a missing Year: Year stays float64 for the whole file
+        df['Year'] = df['Year'].astype(float)
+        df.loc[rows // 2, 'Year'] = np.nan
+    elif case == 'wide_id':
+        # one chunk has an ID beyond int32: ID stays int64 for the whole file
+        df.loc[rows // 2, 'ID'] = 2 ** 40
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('case', ['plain', 'nan_year', 'wide_id'])
+@pytest.mark.parametrize('chunksize', [1000, 1300, 100_000])
+def test_chunked_matches_clean_data(tmp_path, case, chunksize):
+    path = write_csv(tmp_path / 'data.csv', 5000, seed=len(case), case=case)
+    expected = load_and_clean_csv(path)
+    result, stats = clean_csv_chunked(path, chunksize=chunksize)
+    assert_frame_equal(result, expected, check_exact=True)
+    assert stats['rows_out'] == len(expected)
+
+    # every chunk gets the same schema, so they stream into one Arrow file
+    clean_csv_to_arrow(path, tmp_path / 'data.arrow', chunksize=chunksize)
+    with pa.memory_map(str(tmp_path / 'data.arrow')) as source:
+        table = pa.ipc.open_file(source).read_all()
+    assert_frame_equal(table.to_pandas(), expected, check_exact=True)
@@ -0,0 +1,78 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from cleaning import (IMPUTE_COLS, fill_medians, impute_medians, median_tables, new_median_counts,
+                      update_median_counts)
+
+
+def reference_impute(df):
+    # the chained per-column transforms impute_medians() replaced
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)  # observed= default on categorical keys
+        warnings.simplefilter('ignore', RuntimeWarning)  # median of an all-NaN group
+        for col in [col for col in IMPUTE_COLS if col in df.columns]:
+            df[col] = df.groupby(['Sex', 'Sport'])[col].transform(lambda x: x.fillna(x.median()))
+            df[col] = df.groupby('Sex')[col].transform(lambda x: x.fillna(x.median()))
+            df[col] = df[col].fillna(df[col].median())
+    return df
+
+
+def random_frame(seed, rows):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Sex': rng.choice(['M', 'F', None], rows, p=[0.55, 0.4, 0.05]),
+        'Sport': rng.choice(['Swimming', 'Rowing', 'Judo', 'Curling', None], rows, p=[0.3, 0.3, 0.2, 0.15, 0.05]),
+        'Age': rng.integers(14, 40, rows).astype(float),
+        'Height': rng.normal(176, 10, rows).round(),
+        'Weight': rng.normal(71, 14, rows).round(1),
+    })
+    for col, share in [('Age', 0.2), ('Height', 0.4), ('Weight', 0.4)]:
+        df.loc[rng.random(rows) < share, col] = np.nan
+    # a group whose values are all missing falls through to the Sex level
+    df.loc[(df['Sex'] == 'F') & (df['Sport'] == 'Curling'), 'Height'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('rows', [2, 7, 40, 1000])
+@pytest.mark.parametrize('categorical', [False, True])
+def test_impute_medians_matches_chained_transforms(seed, rows, categorical):
+    df = random_frame(seed, rows)
+    if categorical:
+        df[['Sex', 'Sport']] = df[['Sex', 'Sport']].astype('category')
+    assert_frame_equal(impute_medians(df.copy()), reference_impute(df.copy()), check_exact=True)
+
+
+def test_impute_medians_even_groups_and_missing_keys():
+    # even-sized groups take the mean of the two middle values; a row with a
+    # missing key skips the group levels and gets the column median
+    df = pd.DataFrame({
+        'Sex': ['M', 'M', 'M', 'M', 'M', None, 'F', 'F'],
+        'Sport': ['Judo', 'Judo', 'Judo', 'Judo', 'Judo', 'Judo', 'Rowing', None],
+        'Age': [20.0, 21.0, 24.0, 30.0, np.nan, np.nan, np.nan, 33.0],
+        'Height': [np.nan] * 8,
+        'Weight': [60.0, np.nan, 61.0, 62.0, 63.0, np.nan, np.nan, np.nan],
+    })
+    result = impute_medians(df.copy())
+    assert_frame_equal(result, reference_impute(df.copy()), check_exact=True)
+    assert result.loc[4, 'Age'] == 22.5
+    assert result['Height'].isna().all()
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('rows', [2, 7, 40, 1000])
+@pytest.mark.parametrize('pieces', [1, 3])
+def test_median_counts_match_chained_transforms(seed, rows, pieces):
+    # the count-based path chunked / parallel / incremental ingest use: counts
+    # merged over pieces, medians from the merged counts, then the fill
+    df = random_frame(seed, rows)
+    counts = new_median_counts(IMPUTE_COLS)
+    for part in np.array_split(np.arange(rows), pieces):
+        update_median_counts(counts, df.iloc[part], IMPUTE_COLS)
+    tables, global_medians = median_tables(counts, IMPUTE_COLS)
+    result = fill_medians(df.copy(), IMPUTE_COLS, tables, global_medians)
+    assert_frame_equal(result, reference_impute(df.copy()), check_exact=True)
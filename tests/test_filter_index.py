@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from filter_index import FilterIndex
+
+SPORTS = ['Swimming', 'Rowing', 'Judo']
+MEDALS = ['gold', 'silver', 'bronze', 'no medal']
+
+
+def random_frame(seed, rows, missing_sport):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Year': rng.choice([1896, 1900, 1936, 1992, 2016], rows),
+        'Sport': rng.choice(SPORTS, rows).astype(object),
+        'Medal': rng.choice(MEDALS, rows),
+    })
+    if missing_sport:
+        df.loc[rng.random(rows) < 0.1, 'Sport'] = None
+    return df
+
+
+def expected_mask(df, year_range, sports, medals):
+    return (df['Year'].between(*year_range) & df['Sport'].isin(sports) & df['Medal'].isin(medals)).to_numpy()
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('rows', [1, 63, 64, 65, 500])
+@pytest.mark.parametrize('missing_sport', [False, True])
+def test_mask_matches_isin(seed, rows, missing_sport):
+    df = random_frame(seed, rows, missing_sport)
+    index = FilterIndex.from_frame(df)
+    for year_range, sports, medals in [
+        ((1896, 2016), SPORTS, MEDALS),             # every axis covers every value
+        ((1900, 1992), SPORTS, MEDALS),
+        ((1896, 2016), ['Judo'], MEDALS),
+        ((1936, 2016), ['Rowing', 'Judo'], ['gold']),
+        ((2000, 2010), SPORTS, MEDALS),             # no year in range
+        ((1896, 2016), [], MEDALS),
+    ]:
+        expected = expected_mask(df, year_range, sports, medals)
+        np.testing.assert_array_equal(index.mask(year_range, sports, medals), expected)
+        assert index.count(year_range, sports, medals) == expected.sum()
@@ -0,0 +1,80 @@
+import pytest
+from pandas.testing import assert_frame_equal
+
+import incremental
+from benchmark import generate_dataset
+from cleaning import load_and_clean_csv
+from incremental import publish
+from shared_store import attach
+
+
+@pytest.fixture
+def lines(tmp_path):
+    # header + rows of a generated file, with exact duplicates so the
+    # appended parts also repeat rows of the published part
+    df = generate_dataset(3000, seed=7)
+    df = df.iloc[list(range(3000)) + list(range(0, 3000, 9))]
+    path = tmp_path / 'source.csv'
+    df.to_csv(path, index=False)
+    return path.read_bytes().splitlines(keepends=True)
+
+
+def write_lines(path, lines, mode='wb'):
+    with open(path, mode) as f:
+        f.writelines(lines)
+
+
+def assert_published(path, csv_path):
+    assert_frame_equal(attach(path), load_and_clean_csv(csv_path), check_exact=True)
+
+
+def test_append_then_publish_matches_full_rebuild(tmp_path, lines):
+    csv_path, store = tmp_path / 'data.csv', tmp_path / 'store'
+    write_lines(csv_path, lines[:2000])
+    path, delta = publish(csv_path, store)
+    assert delta['mode'] == 'full'
+    assert_published(path, csv_path)
+    assert publish(csv_path, store) == (path, None)
+
+    for start, stop in [(2000, 2600), (2600, len(lines))]:
+        write_lines(csv_path, lines[start:stop], 'ab')
+        path, delta = publish(csv_path, store)
+        assert delta['mode'] == 'append'
+        assert delta['rows_read'] == stop - start
+        assert_published(path, csv_path)
+
+
+@pytest.mark.parametrize('stage', ['full', 'append'])
+def test_rows_appended_during_a_build_are_picked_up(tmp_path, lines, monkeypatch, stage):
+    csv_path, store = tmp_path / 'data.csv', tmp_path / 'store'
+    write_lines(csv_path, lines[:1500])
+    if stage == 'append':
+        publish(csv_path, store)
+        write_lines(csv_path, lines[1500:2000], 'ab')
+    consumed = csv_path.read_bytes()
+
+    # a writer appends while the build is cleaning what it already read
+    hook, real = {'full': ('finish_clean', incremental.finish_clean),
+                  'append': ('apply_row_rules', incremental.apply_row_rules)}[stage]
+
+    def appending(*args):
+        if not appending.done:
+            write_lines(csv_path, lines[2000:2300], 'ab')
+            appending.done = True
+        return real(*args)
+    appending.done = False
+    monkeypatch.setattr(incremental, hook, appending)
+
+    path, delta = publish(csv_path, store)
+    assert delta['mode'] == stage
+    assert appending.done
+    # the snapshot holds exactly the bytes read before the append ...
+    (tmp_path / 'consumed.csv').write_bytes(consumed)
+    assert_frame_equal(attach(path), load_and_clean_csv(tmp_path / 'consumed.csv'), check_exact=True)
+
+    # ... and is stale, so the next publish appends the rest
+    monkeypatch.undo()
+    path, delta = publish(csv_path, store)
+    assert delta is not None and delta['mode'] == 'append'
+    assert delta['rows_read'] == 300
+    assert_published(path, csv_path)
@@ -0,0 +1,44 @@
+import pytest
+
+from benchmark import generate_dataset
+from cleaning import load_and_clean_csv
+from engine import OlympicsEngine
+from report import build_report, resolve_spec
+
+
+@pytest.fixture(scope='module')
+def engine(tmp_path_factory):
+    path = tmp_path_factory.mktemp('report') / 'data.csv'
+    generate_dataset(2000, seed=3).to_csv(path, index=False)
+    return OlympicsEngine(load_and_clean_csv(path))
+
+
+@pytest.mark.parametrize('spec', [
+    {'years': [2016, 1990]},          # backwards
+    {'years': '19'},                  # a string of length 2
+    {'years': [1990.5, 2000]},
+    {'years': [1, 9]},                # outside the data
+    {'years': 3000},
+    {'medals': []},
+    {'sports': ['Curling']},
+    {'order': 'alphabetical'},
+    {'k': 0},
+    {'colour': 'red'},
+])
+def test_resolve_spec_rejects_specs_with_no_rows(engine, spec):
+    with pytest.raises(ValueError):
+        resolve_spec(engine, spec, 1)
+
+
+def test_empty_sports_means_every_sport(engine):
+    specs = [resolve_spec(engine, spec, i) for i, spec in enumerate([{}, {'sports': []}], 1)]
+    overview = build_report(engine, specs)['overview']
+    assert overview['sports'].tolist() == ['all', 'all']
+    assert overview['rows'].tolist() == [len(engine.df)] * 2
+
+
+def test_athletes_is_an_exact_count(engine):
+    first, last = engine.year_bounds()
+    spec = resolve_spec(engine, {'years': [first, (first + last) // 2], 'medals': ['gold', 'silver']}, 1)
+    overview = build_report(engine, [spec])['overview']
+    assert overview['athletes'].iloc[0] == engine.df['Name'][spec['selection'].mask()].nunique()